@@ -1,18 +1,23 @@
-import random
 import matplotlib
-import matplotlib.pyplot as plt
 matplotlib.use('agg')
-import math
+import numpy as np
+
+from expression_compiler import compileExpression
+from function_sampler import evaluate, sampleFunction
+import frame_renderer
+from frame_archive import FrameArchiveWriter, createArchivePath
+from run_history import RunHistory, RunRecording
 
 from multiprocessing import Pool
-from functools import partial
+from contextlib import nullcontext
+from collections import deque, namedtuple
 
-import os
+import time
 
 DEFAULT_LEFT_BORDER = 1
 DEFAULT_RIGHT_BORDER = 30
 
-DEFAULT_POLINOM = lambda x: x**3
+DEFAULT_POLINOM = compileExpression('x**3')
 
 POPULATION_SIZE = 15
 P_CROSSOVER = 0.7
@@ -23,53 +28,249 @@ ITERATIONS = 5
 DEFAULT_TOURNMENT_OPPONENTS = 3
 DEFAULT_ALPHA = 1
 
-class Individual:
-  def __init__(self, x: float) -> None:
-    self.value = x
-  def getValue(self) -> float:
-    return self.value
+STAGNATION_TOLERANCE = 1e-12
+
+REFINE_TOLERANCE = 1e-8
+REFINE_MAX_EVALUATIONS = 60
+
+MAX_FRAMES_IN_FLIGHT = 120
+
+class Population:
+  def __init__(self, x, value=None, fitness=None, evaluated=None) -> None:
+    self.x = np.asarray(x, dtype=np.float64)
+    self.value = np.full(self.x.shape, np.nan) if value is None else value
+    self.fitness = np.full(self.x.shape, -np.inf) if fitness is None else fitness
+    self.evaluated = np.zeros(self.x.shape, dtype=bool) if evaluated is None else evaluated
+  def __len__(self) -> int:
+    return self.x.shape[0]
+  def take(self, indices) -> 'Population':
+    return Population(self.x[indices], self.value[indices], self.fitness[indices], self.evaluated[indices])
+  def concat(self, other: 'Population') -> 'Population':
+    return Population(np.concatenate((self.x, other.x)), np.concatenate((self.value, other.value)),
+                      np.concatenate((self.fitness, other.fitness)), np.concatenate((self.evaluated, other.evaluated)))
   def __repr__(self) -> str:
-    return str(self.value)
-
-def createIndividual(x: float) -> Individual:
-  return Individual(x)
-
-def createPopulation(n: int, l: float, r: float):
-    population= []
-
-    interval_length = r - l
-    step = interval_length / n
-    current = l
-    while(current < r):
-      population.append(createIndividual(current))
-      current += step
-    return population
-
-def mutation(individual: Individual, l, r, alpha) -> None:
-  temp = individual.getValue()
-  value = temp + random.uniform(-2*alpha, 2*alpha)
-  value = max(min(value, r), l)
-  individual.value = value
-
-def crossFunc(first: Individual, second: Individual, alpha, l, r) -> Individual:
-  x = first.getValue()
-  if random.random() < 0.5:
-    x = second.getValue()
-  left_border = x - alpha
-  right_border = x + alpha
-
-  child_value = random.uniform(left_border, right_border)
-
-  child_value = max(min(child_value, r), l)
-
-  return Individual(child_value)
+    return str(self.x)
+
+def createPopulation(n: int, l: float, r: float, offset: float = 0.0) -> Population:
+  return Population(np.linspace(l, r, n, endpoint=False) + offset * (r - l) / n)
+
+def clamp(x: np.ndarray, l, r) -> np.ndarray:
+  return np.clip(x, l, r, out=x)
+
+def mutation(population: Population, mask: np.ndarray, l, r, alpha, rng: np.random.Generator) -> None:
+  count = np.count_nonzero(mask)
+  if count == 0:
+    return
+  population.x[mask] += rng.uniform(-2*alpha, 2*alpha, count)
+  clamp(population.x, l, r)
+  population.evaluated[mask] = False
+
+def crossFunc(first: np.ndarray, second: np.ndarray, alpha, l, r, rng: np.random.Generator) -> Population:
+  x = np.where(rng.random(first.shape[0]) < 0.5, second, first)
+  child_values = x + rng.uniform(-alpha, alpha, x.shape[0])
+  return Population(clamp(child_values, l, r))
+
+def brentMaximize(function, a: float, b: float, x0: float, tolerance: float, max_evaluations: int):
+  golden = 0.5 * (3 - 5 ** 0.5)
+  def negated(x: float) -> float:
+    value = function(x)
+    return np.inf if np.isnan(value) else -value
+
+  x = w = v = x0
+  fx = fw = fv = negated(x)
+  evaluations = 1
+  d = e = 0.0
+  while evaluations < max_evaluations:
+    middle = 0.5 * (a + b)
+    tol1 = 1.5e-8 * abs(x) + tolerance / 3
+    tol2 = 2 * tol1
+    if abs(x - middle) <= tol2 - 0.5 * (b - a):
+      break
+    p = q = r = 0.0
+    if abs(e) > tol1:
+      r = (x - w) * (fx - fv)
+      q = (x - v) * (fx - fw)
+      p = (x - v) * q - (x - w) * r
+      q = 2 * (q - r)
+      if q > 0:
+        p = -p
+      q = abs(q)
+      r = e
+      e = d
+    if abs(p) < abs(0.5 * q * r) and q * (a - x) < p < q * (b - x):
+      d = p / q
+      if (x + d) - a < tol2 or b - (x + d) < tol2:
+        d = tol1 if x < middle else -tol1
+    else:
+      e = (b - x) if x < middle else (a - x)
+      d = golden * e
+    u = x + (d if abs(d) >= tol1 else (tol1 if d > 0 else -tol1))
+    fu = negated(u)
+    evaluations += 1
+    if fu <= fx:
+      if u < x:
+        b = x
+      else:
+        a = x
+      v, fv, w, fw, x, fx = w, fw, x, fx, u, fu
+    else:
+      if u < x:
+        a = u
+      else:
+        b = u
+      if fu <= fw or w == x:
+        v, fv, w, fw = w, fw, u, fu
+      elif fu <= fv or v == x or v == w:
+        v, fv = u, fu
+  return x, -fx, evaluations
+
+def generationStats(values: np.ndarray):
+  values = values[~np.isnan(values)]
+  if values.shape[0] == 0:
+    return (np.nan, np.nan, np.nan, np.nan)
+  return (float(np.mean(values)), float(np.max(values)), float(np.min(values)), float(np.std(values)))
+
+def tournamentIndices(n: int, size: int, k: int, rng: np.random.Generator) -> np.ndarray:
+  k = min(k, n)
+  participants = np.empty((size, k), dtype=np.int64)
+  for column, j in enumerate(range(n - k, n)):
+    candidate = rng.integers(0, j + 1, size)
+    taken = (participants[:, :column] == candidate[:, None]).any(axis=1)
+    participants[:, column] = np.where(taken, j, candidate)
+  return participants
+
+def sampleWithoutReplacement(n: int, m: int, rng: np.random.Generator) -> np.ndarray:
+  return rng.choice(n, min(m, n), replace=False)
+
+def bestIndices(fitness: np.ndarray, m: int) -> np.ndarray:
+  m = min(m, fitness.shape[0])
+  if m == 0:
+    return np.empty(0, dtype=np.int64)
+  best = np.argpartition(fitness, fitness.shape[0] - m)[fitness.shape[0] - m:]
+  return best[np.argsort(fitness[best], kind='stable')[::-1]]
+
+def randomSurvivors(algorithm: 'GenAlgorithm', population: Population, childs: Population):
+  survivors = sampleWithoutReplacement(len(population), algorithm.population_size - len(childs), algorithm.rng)
+  return childs.concat(population.take(survivors)), 0
+
+def elitistSurvivors(algorithm: 'GenAlgorithm', population: Population, childs: Population):
+  elite = bestIndices(population.fitness, algorithm.elite_size)
+  childs = childs.take(np.arange(min(len(childs), algorithm.population_size - elite.shape[0])))
+  rest = np.setdiff1d(np.arange(len(population)), elite, assume_unique=True)
+  survivors = rest[sampleWithoutReplacement(rest.shape[0], algorithm.population_size - elite.shape[0] - len(childs), algorithm.rng)]
+  return population.take(elite).concat(childs).concat(population.take(survivors)), elite.shape[0]
+
+def truncationSurvivors(algorithm: 'GenAlgorithm', population: Population, childs: Population):
+  survivors = bestIndices(population.fitness, algorithm.population_size - len(childs))
+  return childs.concat(population.take(survivors)), 0
+
+def plusSurvivors(algorithm: 'GenAlgorithm', population: Population, childs: Population):
+  algorithm.evaluateFitness(childs)
+  candidates = population.concat(childs)
+  return candidates.take(bestIndices(candidates.fitness, algorithm.population_size)), 0
+
+SURVIVOR_STRATEGIES = {
+  'random': randomSurvivors,
+  'elitist': elitistSurvivors,
+  'truncation': truncationSurvivors,
+  'plus': plusSurvivors,
+}
+DEFAULT_SURVIVOR_STRATEGY = 'random'
+DEFAULT_ELITE_SIZE = 1
+
+def convergenceReason(best_fitness, x: np.ndarray, evaluations: int, elapsed: float,
+                      stagnation_window=None, spread_tolerance=None, evaluation_budget=None, time_budget=None):
+  if stagnation_window is not None and len(best_fitness) > stagnation_window:
+    if best_fitness[-1] - best_fitness[-1 - stagnation_window] <= STAGNATION_TOLERANCE:
+      return 'stagnation'
+  if spread_tolerance is not None and np.std(x) < spread_tolerance:
+    return 'spread'
+  if evaluation_budget is not None and evaluations >= evaluation_budget:
+    return 'evaluations'
+  if time_budget is not None and elapsed >= time_budget:
+    return 'time'
+  return None
+
+
+class MaximaArchive:
+  def __init__(self, sigma_share) -> None:
+    self.sigma_share = sigma_share
+    self.x = np.empty(0)
+    self.y = np.empty(0)
+    self.is_max = np.empty(0, dtype=bool)
+    self.hits = np.empty(0, dtype=np.int64)
+    self.order = np.empty(0, dtype=np.int64)
+    self.iteration = np.empty(0, dtype=np.int64)
+    self.spent = np.empty(0, dtype=np.int64)
+    self.added = 0
+
+  def __len__(self) -> int:
+    return self.x.shape[0]
+
+  def window(self, x: np.ndarray):
+    return (np.searchsorted(self.x, x - self.sigma_share, side='right'),
+            np.searchsorted(self.x, x + self.sigma_share, side='left'))
+
+  def nearest(self, value: float, is_max: bool):
+    lo, hi = self.window(np.array([value]))
+    candidates = np.arange(lo[0], hi[0])
+    candidates = candidates[self.is_max[candidates] == is_max]
+    if candidates.shape[0] == 0:
+      return None
+    return int(candidates[np.argmin(np.abs(self.x[candidates] - value))])
+
+  def add(self, x: float, y: float, is_max: bool, hits: int = 1, iteration: int = 0, spent: int = 0) -> None:
+    self.added += 1
+    k = self.nearest(x, is_max)
+    if k is not None:
+      self.hits[k] += hits
+      return
+    self.insert(x, y, is_max, hits, iteration, spent)
+
+  def insert(self, x: float, y: float, is_max: bool, hits: int, iteration: int = 0, spent: int = 0) -> None:
+    k = int(np.searchsorted(self.x, x))
+    self.x = np.insert(self.x, k, x)
+    self.y = np.insert(self.y, k, y)
+    self.is_max = np.insert(self.is_max, k, is_max)
+    self.hits = np.insert(self.hits, k, hits)
+    self.order = np.insert(self.order, k, self.added)
+    self.iteration = np.insert(self.iteration, k, iteration)
+    self.spent = np.insert(self.spent, k, spent)
+
+  def penalty(self, x: np.ndarray, scale: float) -> np.ndarray:
+    fine = np.zeros(x.shape[0])
+    if len(self) == 0:
+      return fine
+    lo, hi = self.window(x)
+    for offset in range(int(np.max(hi - lo, initial=0))):
+      inside = lo + offset < hi
+      k = lo[inside] + offset
+      fine[inside] += self.hits[k] * scale / (np.abs(self.x[k] - x[inside]) + 0.001)
+    return fine
+
+  def selected(self, is_max: bool) -> np.ndarray:
+    selected = np.flatnonzero(self.is_max == is_max)
+    return selected[np.argsort(self.order[selected], kind='stable')]
+
+  def points(self, is_max: bool):
+    return [(float(self.x[k]), float(self.y[k])) for k in self.selected(is_max)]
+
+  def table(self, is_max: bool) -> np.ndarray:
+    selected = self.selected(is_max)
+    return np.column_stack((self.x[selected], self.y[selected], self.iteration[selected], self.spent[selected]))
 
 class GenAlgorithm:
   def __init__(self, max_epochs=MAX_EPOCHS, population_size=POPULATION_SIZE,\
                left_border=DEFAULT_LEFT_BORDER, right_border=DEFAULT_RIGHT_BORDER,\
                function=DEFAULT_POLINOM, p_crossover=P_CROSSOVER,\
                p_mutation=P_MUTATION, tournment_opponents=DEFAULT_TOURNMENT_OPPONENTS,\
-               alpha=DEFAULT_ALPHA, sigma_share=1) -> None:
+               alpha=DEFAULT_ALPHA, sigma_share=1, seed=None,\
+               survivor_strategy=DEFAULT_SURVIVOR_STRATEGY, elite_size=DEFAULT_ELITE_SIZE,\
+               stagnation_window=None, spread_tolerance=None, evaluation_budget=None, time_budget=None,\
+               refine=False, refine_tolerance=REFINE_TOLERANCE, refine_max_evaluations=REFINE_MAX_EVALUATIONS,\
+               record_history=True, grid_offset=0.0) -> None:
+    if survivor_strategy not in SURVIVOR_STRATEGIES:
+      raise ValueError(f"Unknown survivor strategy: {survivor_strategy}")
     self.population_size = population_size
     self.p_crossover = p_crossover
     self.p_mutation = p_mutation
@@ -77,6 +278,23 @@ class GenAlgorithm:
     self.sigma_share = sigma_share
     self.alpha = alpha
     self.tournment_opponents = tournment_opponents
+    self.survivors = SURVIVOR_STRATEGIES[survivor_strategy]
+    self.elite_size = elite_size
+
+    self.stagnation_window = stagnation_window
+    self.spread_tolerance = spread_tolerance
+    self.evaluation_budget = evaluation_budget
+    self.time_budget = time_budget
+    self.stop_reason = None
+    self.epochs_used = 0
+    self.iterations_done = 0
+    self.found = 0
+    self.last_entry = None
+
+    self.refine_enabled = refine
+    self.refine_tolerance = refine_tolerance
+    self.refine_max_evaluations = refine_max_evaluations
+    self.refine_evaluations = 0
 
     self.function = function
     self.left_border = left_border
@@ -84,206 +302,304 @@ class GenAlgorithm:
 
     self.history_x = []
     self.history_y = []
-    self.history_max = []
+    self.stats = []
+    self.record_history = record_history
+    self.archive = MaximaArchive(sigma_share)
     self.population = None
-
-    self.strange_dots = []
-
-  def fitnessFunc(self, individual: Individual) -> float:
-    value = self.function(individual.getValue())
-    fine = 0.0
-    for maximum in self.history_max + self.strange_dots:
-      if math.fabs(maximum[0] - individual.getValue()) < self.sigma_share:
-        fine += (self.right_border - self.left_border)*2 / (math.fabs(maximum[0] - individual.getValue()) + 0.001)
-
-    return value - fine
-
-  def tournmentSelection(self, population):
-    selected = []
-    for _ in range(self.population_size):
-      participants = random.sample(population, self.tournment_opponents)
-      best_ind = max(participants, key=lambda ind: self.fitnessFunc(ind))
-      selected.append(best_ind)
-    return selected
-
-  def findLocalMax(self, ans):
-    result = None
-    ans = sorted(ans, key=lambda x: x[0])
-    for i in range(1, len(ans) - 1):
-      if ans[i-1][1] < ans[i][1] > ans[i+1][1]:
-        result = ans[i]
-    return result
-
-
-  def fit(self):
-    self.population = createPopulation(self.population_size, self.left_border, self.right_border)
-
-    self.history_x.append([ind.getValue() for ind in self.population])
-    temp_y = []
-    for i in range(len(self.population)):
-      try:
-        start_value = self.function(self.population[i].getValue())
-      except Exception:
-        self.population[i].value = self.population[i].value + 0.001
-        start_value = self.function(self.population[i].getValue())
-      temp_y.append(start_value)
-    
-    self.history_y.append(temp_y)
-    
-    i = 0
-    while(i < self.max_epochs):
-
-      best_ind = self.tournmentSelection(self.population)
-      best_ind_shuffled = self.tournmentSelection(self.population)
-      random.shuffle(best_ind_shuffled)
-
-      childs = []
-      for j in range(self.population_size):
-        if random.random() < self.p_crossover:
-          childs.append(crossFunc(best_ind[j], best_ind_shuffled[j], self.alpha, self.left_border, self.right_border))
-
-      childs_length = len(childs)
-      add = set()
-      while(childs_length) < self.population_size:
-        choise = random.choice(self.population)
-
-        if not(choise in add):
-          add.add(choise)
-          childs_length += 1
-
-      self.population = childs + list(add)
-
-      for j in range(self.population_size):
-        if random.random() < self.p_mutation:
-          mutation(self.population[j], self.left_border, self.right_border, self.alpha)
-
-      self.history_x.append([ind.getValue() for ind in self.population])
-      self.history_y.append([self.function(ind.getValue()) for ind in self.population])
-
-      i += 1
-
-    local_ans = [(self.population[i].getValue(), self.function(self.population[i].getValue())) for i in range(self.population_size)]
-    found_max = max(local_ans, key=lambda x: x[1])
-    found_local_max = self.findLocalMax(local_ans)
+    self.grid_offset = grid_offset
+
+    self.evaluations = 0
+
+    if not isinstance(seed, np.random.SeedSequence):
+      seed = np.random.SeedSequence(seed)
+    self.seed_sequence = seed
+    self.rng = np.random.default_rng(seed)
+
+  def objective(self, x: np.ndarray) -> np.ndarray:
+    self.evaluations += x.shape[0]
+    return evaluate(self.function, x)
+
+  def penalty(self, x: np.ndarray) -> np.ndarray:
+    return self.archive.penalty(x, (self.right_border - self.left_border)*2)
+
+  @property
+  def history_max(self):
+    return self.archive.points(True)
+
+  @property
+  def strange_dots(self):
+    return self.archive.points(False)
+
+  @property
+  def maxima_table(self):
+    return self.archive.table(True)
+
+  @property
+  def strange_table(self):
+    return self.archive.table(False)
+
+  def fitnessFunc(self, x: np.ndarray) -> np.ndarray:
+    return self.objective(x) - self.penalty(x)
+
+  def evaluateFitness(self, population: Population) -> np.ndarray:
+    stale = ~population.evaluated
+    if np.any(stale):
+      x = population.x[stale]
+      population.value[stale] = self.objective(x)
+      population.fitness[stale] = np.nan_to_num(population.value[stale] - self.penalty(x), nan=-np.inf)
+      population.evaluated[stale] = True
+    return population.fitness
+
+  def tournmentSelection(self, population: Population, size: int) -> np.ndarray:
+    fitness = self.evaluateFitness(population)
+    participants = tournamentIndices(len(population), size, self.tournment_opponents, self.rng)
+    return participants[np.arange(size), np.argmax(fitness[participants], axis=1)]
+
+  def findLocalMax(self, x: np.ndarray, y: np.ndarray):
+    order = np.argsort(x, kind='stable')
+    x, y = x[order], y[order]
+    peaks = np.flatnonzero((y[1:-1] > y[:-2]) & (y[1:-1] > y[2:])) + 1
+    if peaks.shape[0] == 0:
+      return None
+    return (float(x[peaks[-1]]), float(y[peaks[-1]]))
+
+
+  def start(self) -> None:
+    self.rng = np.random.default_rng(self.seed_sequence.spawn(1)[0])
+    self.population = createPopulation(self.population_size, self.left_border, self.right_border, self.grid_offset)
+
+    self.evaluateFitness(self.population)
+    self.record()
+
+  def record(self) -> None:
+    self.stats.append(generationStats(self.population.value))
+    if self.record_history:
+      self.history_x.append(self.population.x.copy())
+      self.history_y.append(self.population.value.copy())
+
+  def step(self) -> None:
+    crossing = np.count_nonzero(self.rng.random(self.population_size) < self.p_crossover)
+    best_ind = self.tournmentSelection(self.population, crossing)
+    best_ind_shuffled = self.tournmentSelection(self.population, crossing)
+    childs = crossFunc(self.population.x[best_ind], self.population.x[best_ind_shuffled], self.alpha, self.left_border, self.right_border, self.rng)
+
+    self.population, protected = self.survivors(self, self.population, childs)
+
+    mutating = self.rng.random(self.population_size) < self.p_mutation
+    mutating[:protected] = False
+    mutation(self.population, mutating, self.left_border, self.right_border, self.alpha, self.rng)
+
+    self.evaluateFitness(self.population)
+    self.record()
+
+  def emigrants(self, count: int) -> Population:
+    best = np.argsort(self.population.fitness, kind='stable')[::-1][:count]
+    return self.population.take(best)
+
+  def immigrate(self, migrants: Population) -> None:
+    count = min(len(migrants), len(self.population))
+    if count == 0:
+      return
+    worst = np.argsort(self.population.fitness, kind='stable')[:count]
+    self.population.x[worst] = migrants.x[:count]
+    self.population.value[worst] = migrants.value[:count]
+    self.population.fitness[worst] = np.nan_to_num(migrants.value[:count] - self.penalty(migrants.x[:count]), nan=-np.inf)
+    self.population.evaluated[worst] = True
+
+  def refine(self, candidate):
+    left = max(self.left_border, candidate[0] - self.alpha)
+    right = min(self.right_border, candidate[0] + self.alpha)
+    x, y, evaluations = brentMaximize(lambda value: float(self.objective(np.array([value]))[0]),
+                                      left, right, candidate[0], self.refine_tolerance, self.refine_max_evaluations)
+    self.refine_evaluations += evaluations
+    if np.isnan(y) or y < candidate[1]:
+      return candidate
+    return (float(x), float(y))
+
+  def finish(self):
+    local_x = self.population.x
+    local_y = self.population.value
+    best = int(np.argmax(np.nan_to_num(local_y, nan=-np.inf)))
+    found_max = (float(local_x[best]), float(local_y[best]))
+    found_local_max = self.findLocalMax(local_x, local_y)
 
     total_ans = None
     if found_local_max != None and found_max[1] == found_local_max[1] or (found_local_max == None and (found_max[0] - self.left_border < 1e-2 or self.right_border - found_max[0] < 1e-2)):
-      flag = True
-      for maximum in self.history_max:
-        if math.fabs(maximum[0] - found_max[0]) < self.sigma_share:
-          flag = False
-          break
-      if flag:
-        total_ans = found_max
-        self.history_max.append(found_max)
+      if self.archive.nearest(found_max[0], True) is None:
+        total_ans = found_max = self.refine(found_max) if self.refine_enabled else found_max
 
-    if total_ans == None:
-      self.strange_dots.append(found_max)
+    self.last_entry = (found_max[0], found_max[1], total_ans is not None)
+    self.found = int(total_ans is not None)
+    self.archive.add(found_max[0], found_max[1], total_ans is not None,
+                     iteration=self.iterations_done, spent=self.evaluations)
+    self.iterations_done += 1
 
     return total_ans
 
-def getFunctionDots(n: int, l: float, r: float, func):
-    interval_length = r - l
-    step = interval_length / n
-    current = l
-    x = []
-    y = []
-    while(current < r):
-      x.append(current)
-      y.append(func(current))
-      current += step
-    return x, y
-
-def save_plots(i, j, max_epochs, l, r, x_func, y_func, history_x, history_y, history_max, population_size, ans, max_iterations, all_history_y):
-    plt.figure(figsize=(10, 6))
-    plt.plot(x_func, y_func, 'b')
-    plt.xlim(l - abs(0.3 * r), r + abs(0.3 * r))
-    plt.plot(history_x[i], history_y[i], 'ro')
-    plt.grid()
-
-    x_max, y_max = [history_max[i][0] for i in range(len(history_max) - 1)], [history_max[i][1] for i in range(len(history_max) - 1)]
-    if ans == None or (j+1)*(i+1) == max_iterations*max_epochs:
-      x_max.append(history_max[len(history_max) - 1][0])
-      y_max.append(history_max[len(history_max) - 1][1])
-    plt.plot(x_max, y_max, 'go')
-    plt.xlabel('x')
-    plt.ylabel('f(x)')
-
-    plt.title(f"Iteration: {j + 1}, Epoch: {i + 1}")
-    filename = f'./frames/algorithm_{j * max_epochs + i}.jpg'
-    plt.savefig(filename, dpi=300)
-    plt.close()
-
-    plt.figure(figsize=(10, 6))
-    average_fitness = [sum(all_history_y[k]) / population_size for k in range(j*(max_epochs + 1) + i + 1)]
-    maximum_fitness = [max(all_history_y[k]) for k in range(j*(max_epochs + 1) + i + 1)]
-    plt.plot(average_fitness, marker='o', linestyle='-', color='black', markerfacecolor='red', label='Average fitness')
-    plt.plot(maximum_fitness, marker='o', linestyle='-', color='blue', markerfacecolor='green', label='Max fitness')
-    plt.legend(loc='lower right')
-    plt.grid()
-    plt.title(f"Iteration: {j + 1}, Epoch: {i + 1}")
-    plt.savefig(f'./frames/average_fitness_{j * max_epochs + i}.jpg', dpi=300)
-    plt.close()
+  def convergence(self, best_fitness, started: float, start_evaluations: int):
+    return convergenceReason(best_fitness, self.population.x, self.evaluations - start_evaluations,
+                             time.perf_counter() - started, self.stagnation_window, self.spread_tolerance,
+                             self.evaluation_budget, self.time_budget)
+
+  def fit(self, progress=None):
+    started = time.perf_counter()
+    start_evaluations = self.evaluations
+    self.start()
+    best_fitness = [np.max(self.population.fitness)]
+    self.stop_reason = 'max_epochs'
+
+    i = 0
+    while(i < self.max_epochs):
+      self.step()
+      i += 1
+      best_fitness.append(np.max(self.population.fitness))
+      if progress is not None:
+        progress(i, self.stats[-1][1])
+      reason = self.convergence(best_fitness, started, start_evaluations)
+      if reason is not None:
+        self.stop_reason = reason
+        break
+
+    self.epochs_used = i
+    return self.finish()
+
+Progress = namedtuple('Progress', 'iteration epoch best maxima eta recording stop_reason')
+
+class RunResult(list):
+  def __init__(self, maxima, strange_dots, iterations, evaluations, elapsed, stop_reason, refine_evaluations, stats, recording=None, frame_archive=None, samples=None,
+               maxima_table=None, strange_table=None, iteration_stop_reasons=None) -> None:
+    super().__init__(maxima)
+    self.strange_dots = strange_dots
+    self.iterations = iterations
+    self.evaluations = evaluations
+    self.elapsed = elapsed
+    self.stop_reason = stop_reason
+    self.refine_evaluations = refine_evaluations
+    self.stats = stats
+    self.recording = recording
+    self.frame_archive = frame_archive
+    self.samples = samples
+    self.maxima_table = maxima_table
+    self.strange_table = strange_table
+    self.iteration_stop_reasons = iteration_stop_reasons
 
 def run(iterations=ITERATIONS, max_epochs=MAX_EPOCHS,
         l=DEFAULT_LEFT_BORDER, r=DEFAULT_RIGHT_BORDER,
         polinom=DEFAULT_POLINOM, population_size=POPULATION_SIZE,
         p_crossover=P_CROSSOVER, p_mutation=P_MUTATION,
         tournment_opponents=DEFAULT_TOURNMENT_OPPONENTS, alpha=DEFAULT_ALPHA,
-        sigma_share=None, visualize=True):
+        sigma_share=None, visualize=True, seed=42, islands=1,
+        migration_interval=None, migration_size=None, topology=None,
+        survivor_strategy=DEFAULT_SURVIVOR_STRATEGY, elite_size=DEFAULT_ELITE_SIZE,
+        stagnation_window=None, spread_tolerance=None, evaluation_budget=None, time_budget=None,
+        patience=None, total_evaluation_budget=None, total_time_budget=None, refine=False,
+        frames_in_flight=MAX_FRAMES_IN_FLIGHT, prerender=False, frame_dpi=frame_renderer.DPI, progress=None,
+        samples=None):
+    if iterations is None and patience is None and total_evaluation_budget is None and total_time_budget is None:
+      raise ValueError("An open-ended run needs patience, total_evaluation_budget or total_time_budget")
+    started = time.perf_counter()
     if sigma_share is None:
       sigma_share = (r - l) / 12 + 1
 
-    if not os.path.exists('frames'):
-      os.makedirs('frames')
+    prerender = visualize and prerender
+
+    if samples is None or not samples.matches(polinom, l, r):
+      samples = sampleFunction(polinom, l, r)
+    x_func, y_func = samples.x, samples.y
+    recording = RunRecording(l, r, x_func, y_func) if visualize else None
+
+    options = dict(survivor_strategy=survivor_strategy, elite_size=elite_size,
+                   stagnation_window=stagnation_window, spread_tolerance=spread_tolerance,
+                   evaluation_budget=evaluation_budget, time_budget=time_budget, refine=refine,
+                   record_history=visualize)
+    if islands > 1:
+      from islands import IslandModel, DEFAULT_MIGRATION_INTERVAL, DEFAULT_MIGRATION_SIZE, DEFAULT_TOPOLOGY
+      A = IslandModel(islands, max_epochs, population_size, l, r, polinom, p_crossover, p_mutation, tournment_opponents, alpha, sigma_share, seed,
+                      migration_interval or DEFAULT_MIGRATION_INTERVAL, migration_size or DEFAULT_MIGRATION_SIZE, topology or DEFAULT_TOPOLOGY, **options)
     else:
-      for file in os.listdir('frames'):
-        if file.endswith('.jpg'):
-            os.remove(os.path.join('frames', file))
-
-    x_func, y_func = getFunctionDots(1000, l, r, polinom)
-
-    random.seed(42)
-    A = GenAlgorithm(max_epochs, population_size, l, r, polinom, p_crossover, p_mutation, tournment_opponents, alpha, sigma_share)
-
-    permanent_history_y = []
-
-    with Pool() as pool:
-      for j in range(iterations):
-        ans = A.fit()
+      A = GenAlgorithm(max_epochs, population_size, l, r, polinom, p_crossover, p_mutation, tournment_opponents, alpha, sigma_share, seed, **options)
+
+    with (FrameArchiveWriter(createArchivePath()) if prerender else nullcontext()) as archive, \
+         (RunHistory() if prerender else nullcontext()) as history, \
+         (Pool(initializer=frame_renderer.initRenderer, initargs=(l, r, x_func, y_func, history.directory, frame_dpi))
+          if prerender else nullcontext()) as pool, \
+         (A if islands > 1 else nullcontext()):
+      pending = deque()
+      in_flight = 0
+      held = None
+      j = 0
+      idle = 0
+      epochs_done = 0
+      stop_reason = 'iterations'
+      iteration_stop_reasons = []
+
+      def report(epoch, best, stop_reason=None):
+        done = epochs_done + epoch
+        eta = None
+        if iterations is not None and done > 0:
+          eta = (time.perf_counter() - started) / done * max(iterations * max_epochs - done, 0)
+        progress(Progress(j, epoch, float(best), list(A.history_max), eta, recording, stop_reason))
+
+      while iterations is None or j < iterations:
+        stats_offset = len(A.stats)
+        ans = A.fit(report if progress is not None else None)
 
         if visualize:
-
-          permanent_history_y += A.history_y
-          worker = partial(save_plots,
-                            j=j,
-                            max_epochs=max_epochs,
-                            l=l,
-                            r=r,
-                            x_func=x_func,
-                            y_func=y_func,
-                            history_x=A.history_x,
-                            history_y=A.history_y,
-                            history_max=A.history_max,
-                            population_size=population_size,
-                            ans=ans,
-                            max_iterations=iterations,
-                            all_history_y = permanent_history_y)
-
-          pool.map(worker, range(max_epochs))
-
-        
+          recording.record(j, A.history_x, A.history_y, A.stats[stats_offset:], A.history_max, A.found)
+        if prerender:
+          history.record(j, A.history_x, A.history_y, A.stats[stats_offset:], A.history_max, A.found)
+          start = recording.iterationStart(j)
+          jobs = ([held] if held is not None else []) + [(start + i, j, i, False) for i in range(A.epochs_used)]
+          held = jobs.pop() if jobs else held
+          pending.append((pool.map_async(frame_renderer.renderFrame, jobs), len(jobs)))
+          in_flight += len(jobs)
+          while in_flight > frames_in_flight and len(pending) > 1:
+            rendering, frames = pending.popleft()
+            archive.extend(rendering.get())
+            in_flight -= frames
 
         A.history_x = []
         A.history_y = []
         print(ans)
+        iteration_stop_reasons.append(A.stop_reason)
+        if progress is not None:
+          report(A.epochs_used, A.stats[-1][1], A.stop_reason)
+        epochs_done += max_epochs
+
+        j += 1
+        idle = 0 if ans is not None else idle + 1
+        if patience is not None and idle >= patience:
+          stop_reason = 'patience'
+          break
+        if total_evaluation_budget is not None and A.evaluations >= total_evaluation_budget:
+          stop_reason = 'evaluations'
+          break
+        if total_time_budget is not None and time.perf_counter() - started >= total_time_budget:
+          stop_reason = 'time'
+          break
+
+      if held is not None:
+        pending.append((pool.map_async(frame_renderer.renderFrame, [held[:-1] + (True,)]), 1))
+      for rendering, _ in pending:
+        archive.extend(rendering.get())
+
+    frame_archive = archive.path if prerender else None
+    if recording is not None:
+      recording.finished = True
 
     print("Ans:")
     print(A.history_max)
     print("Strange dots:")
     print(A.strange_dots)
-
-    return A.history_max
+    print("Evaluations:")
+    print(A.evaluations)
+    if refine:
+      print("Refinement evaluations:")
+      print(A.refine_evaluations)
+
+    return RunResult(A.history_max, A.strange_dots, j, A.evaluations, time.perf_counter() - started, stop_reason, A.refine_evaluations,
+                     np.array(A.stats, dtype=np.float64).reshape(-1, 4), recording, frame_archive, samples,
+                     A.maxima_table, A.strange_table, iteration_stop_reasons)
 
 if __name__ == "__main__":
     run()
\ No newline at end of file
@@ -0,0 +1,114 @@
+import ast
+from functools import lru_cache
+
+import numpy as np
+
+FUNCTIONS = {
+  'sin': np.sin, 'cos': np.cos, 'tan': np.tan,
+  'asin': np.arcsin, 'acos': np.arccos, 'atan': np.arctan,
+  'sinh': np.sinh, 'cosh': np.cosh, 'tanh': np.tanh,
+  'exp': np.exp, 'log': np.log, 'log2': np.log2, 'log10': np.log10,
+  'sqrt': np.sqrt, 'abs': np.abs, 'fabs': np.fabs,
+  'floor': np.floor, 'ceil': np.ceil,
+}
+
+CONSTANTS = {'pi': np.pi, 'e': np.e}
+
+BINARY_OPERATORS = {
+  ast.Add: 'np.add', ast.Sub: 'np.subtract', ast.Mult: 'np.multiply',
+  ast.Div: 'np.true_divide', ast.FloorDiv: 'np.floor_divide',
+  ast.Mod: 'np.mod', ast.Pow: 'np.power',
+}
+
+UNARY_OPERATORS = {ast.USub: 'np.negative', ast.UAdd: 'np.positive'}
+
+MODULE_PREFIXES = ('math', 'np', 'numpy')
+
+VARIABLE = 'x'
+
+
+def functionName(node: ast.expr) -> str:
+  if isinstance(node, ast.Name):
+    name = node.id
+  elif isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id in MODULE_PREFIXES:
+    name = node.attr
+  else:
+    raise ValueError("Only plain function calls are allowed")
+  if name not in FUNCTIONS:
+    raise ValueError(f"Unknown function: {name}")
+  return name
+
+
+def emit(node: ast.expr) -> str:
+  if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+    return f"{BINARY_OPERATORS[type(node.op)]}({emit(node.left)}, {emit(node.right)})"
+  if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+    return f"{UNARY_OPERATORS[type(node.op)]}({emit(node.operand)})"
+  if isinstance(node, ast.Call):
+    if node.keywords or len(node.args) != 1:
+      raise ValueError("Functions take exactly one argument")
+    return f"f_{functionName(node.func)}({emit(node.args[0])})"
+  if isinstance(node, ast.Name):
+    if node.id == VARIABLE:
+      return VARIABLE
+    if node.id in CONSTANTS:
+      return repr(float(CONSTANTS[node.id]))
+    raise ValueError(f"Unknown name: {node.id}")
+  if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id in MODULE_PREFIXES \
+     and node.attr in CONSTANTS:
+    return repr(float(CONSTANTS[node.attr]))
+  if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+    try:
+      value = float(node.value)
+    except OverflowError as e:
+      raise ValueError("Numeric constant is out of range") from e
+    if not np.isfinite(value):
+      raise ValueError("Numeric constant is out of range")
+    return repr(value)
+  raise ValueError(f"Unsupported syntax: {ast.unparse(node)}")
+
+
+def parseExpression(text: str) -> ast.Expression:
+  try:
+    return ast.parse(text.strip().replace('^', '**'), mode='eval')
+  except SyntaxError as e:
+    raise ValueError(f"Invalid expression: {text}") from e
+
+
+def normalizeExpression(text: str) -> str:
+  return ast.unparse(parseExpression(text))
+
+
+class CompiledExpression:
+  vectorized = True
+
+  def __init__(self, text: str) -> None:
+    self.text = text
+    self.source = emit(parseExpression(text).body)
+    namespace = {'__builtins__': {}, 'np': np}
+    namespace.update({f"f_{name}": func for name, func in FUNCTIONS.items()})
+    self.code = eval(f"lambda {VARIABLE}: {self.source}", namespace)
+
+  def __call__(self, x):
+    values = np.asarray(x, dtype=np.float64)
+    with np.errstate(all='ignore'):
+      result = np.array(np.broadcast_to(self.code(values), values.shape), dtype=np.float64)
+    result[~np.isfinite(result)] = np.nan
+    if result.ndim == 0:
+      return float(result)
+    return result
+
+  def __reduce__(self):
+    return (compileExpression, (self.text,))
+
+  def __repr__(self) -> str:
+    return f"CompiledExpression({self.text!r})"
+
+
+@lru_cache(maxsize=64)
+def compileNormalized(text: str) -> CompiledExpression:
+  return CompiledExpression(text)
+
+
+def compileExpression(text: str) -> CompiledExpression:
+  return compileNormalized(normalizeExpression(text))
@@ -0,0 +1,103 @@
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+FRAMES_DIRECTORY = 'frames'
+ARCHIVE_SUFFIX = '.frames'
+MAGIC = b'GAFRAME1'
+FOOTER = struct.Struct('<8sQQ')
+
+ALGORITHM, FITNESS = range(2)
+
+
+def createArchivePath(directory: str = FRAMES_DIRECTORY) -> str:
+  os.makedirs(directory, exist_ok=True)
+  descriptor, path = tempfile.mkstemp(prefix='run_', suffix=ARCHIVE_SUFFIX, dir=directory)
+  os.close(descriptor)
+  return path
+
+
+def removeArchive(path: str) -> None:
+  try:
+    os.remove(path)
+  except FileNotFoundError:
+    pass
+  try:
+    os.rmdir(os.path.dirname(path) or '.')
+  except OSError:
+    pass
+
+
+class FrameArchiveWriter:
+  def __init__(self, path: str) -> None:
+    self.path = path
+    self.file = open(path, 'wb')
+    self.file.write(MAGIC)
+    self.index = []
+
+  def append(self, frame: int, *images: bytes) -> None:
+    row = [frame]
+    for image in images:
+      row += [self.file.tell(), len(image)]
+      self.file.write(image)
+    self.index.append(row)
+
+  def extend(self, frames) -> None:
+    for frame, *images in frames:
+      self.append(frame, *images)
+
+  def close(self) -> None:
+    if self.file.closed:
+      return
+    index_offset = self.file.tell()
+    index = np.array(self.index, dtype='<i8').reshape(-1, 5)
+    self.file.write(index.tobytes())
+    self.file.write(FOOTER.pack(MAGIC, index_offset, len(index)))
+    self.file.close()
+
+  def __enter__(self) -> 'FrameArchiveWriter':
+    return self
+
+  def __exit__(self, exc_type, *exc) -> None:
+    self.close()
+    if exc_type is not None:
+      removeArchive(self.path)
+
+
+class FrameArchive:
+  def __init__(self, path: str) -> None:
+    self.path = path
+    self.file = open(path, 'rb')
+    self.file.seek(-FOOTER.size, os.SEEK_END)
+    magic, index_offset, count = FOOTER.unpack(self.file.read(FOOTER.size))
+    if magic != MAGIC:
+      raise ValueError(f"Not a frame archive: {path}")
+    self.file.seek(index_offset)
+    index = np.frombuffer(self.file.read(count * 5 * 8), dtype='<i8').reshape(-1, 5)
+    self.entries = {int(row[0]): row[1:].reshape(2, 2) for row in index}
+
+  @property
+  def frames(self):
+    return sorted(self.entries)
+
+  def __len__(self) -> int:
+    return len(self.entries)
+
+  def __contains__(self, frame: int) -> bool:
+    return frame in self.entries
+
+  def read(self, frame: int, kind: int = ALGORITHM) -> bytes:
+    offset, length = self.entries[frame][kind]
+    self.file.seek(offset)
+    return self.file.read(length)
+
+  def close(self) -> None:
+    self.file.close()
+
+  def __enter__(self) -> 'FrameArchive':
+    return self
+
+  def __exit__(self, *exc) -> None:
+    self.close()
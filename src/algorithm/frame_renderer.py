@@ -0,0 +1,104 @@
+from io import BytesIO
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image
+
+from run_history import HistoryReader
+
+FIGSIZE = (10, 6)
+DPI = 300
+MIN_DPI = 30
+DPI_STEP = 10
+JPEG_QUALITY = 90
+
+RESOLUTION_PRESETS = {
+  'low': 60,
+  'medium': 120,
+  'high': DPI,
+}
+
+STATS_MEAN, STATS_MAX, STATS_MIN, STATS_STD = range(4)
+
+
+def fitDpi(width: int, height: int, figsize=FIGSIZE) -> int:
+  dpi = min(width / figsize[0], height / figsize[1])
+  return int(np.clip(np.ceil(dpi / DPI_STEP) * DPI_STEP, MIN_DPI, DPI))
+
+
+class FrameRenderer:
+  def __init__(self, l, r, x_func, y_func, figsize=FIGSIZE, dpi=DPI) -> None:
+    self.algorithm_figure = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(self.algorithm_figure)
+    ax = self.algorithm_figure.add_subplot(111)
+    ax.plot(x_func, y_func, 'b')
+    ax.set_xlim(l - abs(0.3 * r), r + abs(0.3 * r))
+    ax.grid()
+    ax.set_xlabel('x')
+    ax.set_ylabel('f(x)')
+    self.population_line, = ax.plot([], [], 'ro', animated=True)
+    self.maxima_line, = ax.plot([], [], 'go', animated=True)
+    self.algorithm_title = ax.set_title(' ', animated=True)
+    self.algorithm_figure.canvas.draw()
+    self.background = self.algorithm_figure.canvas.copy_from_bbox(self.algorithm_figure.bbox)
+
+    self.fitness_figure = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(self.fitness_figure)
+    self.fitness_axes = self.fitness_figure.add_subplot(111)
+    self.average_line, = self.fitness_axes.plot([], [], marker='o', linestyle='-', color='black', markerfacecolor='red', label='Average fitness')
+    self.maximum_line, = self.fitness_axes.plot([], [], marker='o', linestyle='-', color='blue', markerfacecolor='green', label='Max fitness')
+    self.fitness_axes.legend(loc='lower right')
+    self.fitness_axes.grid()
+    self.fitness_title = self.fitness_axes.set_title(' ')
+
+  def renderAlgorithm(self, title, x, y, max_x, max_y) -> np.ndarray:
+    canvas = self.algorithm_figure.canvas
+    canvas.restore_region(self.background)
+    self.population_line.set_data(x, y)
+    self.maxima_line.set_data(max_x, max_y)
+    self.algorithm_title.set_text(title)
+    for artist in (self.population_line, self.maxima_line, self.algorithm_title):
+      self.algorithm_figure.draw_artist(artist)
+    return np.asarray(canvas.buffer_rgba())
+
+  def renderFitness(self, title, average, maximum) -> np.ndarray:
+    generations = np.arange(len(average))
+    self.average_line.set_data(generations, average)
+    self.maximum_line.set_data(generations, maximum)
+    self.fitness_title.set_text(title)
+    self.fitness_axes.relim()
+    self.fitness_axes.autoscale_view()
+    self.fitness_figure.canvas.draw()
+    return np.asarray(self.fitness_figure.canvas.buffer_rgba())
+
+  def render(self, source, iteration, epoch, last_iteration):
+    title = f"Iteration: {iteration + 1}, Epoch: {epoch + 1}"
+    populations = source.population(iteration)
+    maxima, found = source.foundMaxima(iteration)
+    if found and not (last_iteration and epoch + 2 == populations.shape[1]):
+      maxima = maxima[:-found]
+    algorithm = self.renderAlgorithm(title, populations[0, epoch], populations[1, epoch], maxima[:, 0], maxima[:, 1])
+    stats = source.statsUntil(iteration, epoch)
+    fitness = self.renderFitness(title, stats[:, STATS_MEAN], stats[:, STATS_MAX])
+    return algorithm, fitness
+
+
+def encodeImage(image: np.ndarray) -> bytes:
+  buffer = BytesIO()
+  Image.fromarray(image[:, :, :3]).save(buffer, format='JPEG', quality=JPEG_QUALITY)
+  return buffer.getvalue()
+
+
+renderer = None
+history = None
+
+def initRenderer(l, r, x_func, y_func, directory, dpi=DPI) -> None:
+  global renderer, history
+  renderer = FrameRenderer(l, r, x_func, y_func, dpi=dpi)
+  history = HistoryReader(directory)
+
+def renderFrame(job):
+  frame, j, i, last_iteration = job
+  algorithm, fitness = renderer.render(history, j, i, last_iteration)
+  return frame, encodeImage(algorithm), encodeImage(fitness)
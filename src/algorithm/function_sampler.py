@@ -0,0 +1,149 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_POINTS = 1000
+DEFAULT_REFINE_BUDGET = 1000
+REFINE_PASSES = 8
+CURVATURE_TOLERANCE = 2e-3
+SLOPE_TOLERANCE = 2e-2
+MIN_SEGMENT = 1e-9
+GRID_CHUNK = 250
+GRID_CACHE_SIZE = 16
+GRID_SPAN_LIMIT = 8
+
+
+def evaluateScalar(function, value: float) -> float:
+  try:
+    return function(value)
+  except (ArithmeticError, ValueError):
+    return np.nan
+
+def evaluate(function, x: np.ndarray) -> np.ndarray:
+  if getattr(function, 'vectorized', False):
+    return function(x)
+  values = np.fromiter((evaluateScalar(function, value) for value in x), dtype=np.float64, count=x.shape[0])
+  values[~np.isfinite(values)] = np.nan
+  return values
+
+
+def segmentScores(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+  finite = np.isfinite(y)
+  scores = np.zeros(x.shape[0] - 1)
+  if not np.any(finite):
+    return scores
+  span = np.max(y[finite]) - np.min(y[finite])
+  if span > 0:
+    steep = np.nan_to_num(np.abs(np.diff(y)) / span) / SLOPE_TOLERANCE
+    chord = y[:-2] + (y[2:] - y[:-2]) * (x[1:-1] - x[:-2]) / (x[2:] - x[:-2])
+    bend = np.nan_to_num(np.abs(y[1:-1] - chord) / span) / CURVATURE_TOLERANCE
+    scores = np.maximum(scores, steep)
+    scores[:-1] = np.maximum(scores[:-1], bend)
+    scores[1:] = np.maximum(scores[1:], bend)
+  scores[finite[:-1] != finite[1:]] = np.inf
+  scores[np.diff(x) < MIN_SEGMENT * (x[-1] - x[0])] = 0
+  return scores
+
+def refineSamples(function, x: np.ndarray, y: np.ndarray, budget: int, cancelled=None):
+  evaluations = 0
+  for _ in range(REFINE_PASSES):
+    if budget - evaluations <= 0 or x.shape[0] < 3 or (cancelled is not None and cancelled()):
+      break
+    scores = segmentScores(x, y)
+    flagged = np.flatnonzero(scores > 1)
+    if flagged.shape[0] == 0:
+      break
+    if flagged.shape[0] > budget - evaluations:
+      flagged = flagged[np.argpartition(scores[flagged], -(budget - evaluations))[-(budget - evaluations):]]
+      flagged.sort()
+    middle = (x[flagged] + x[flagged + 1]) / 2
+    x = np.insert(x, flagged + 1, middle)
+    y = np.insert(y, flagged + 1, evaluate(function, middle))
+    evaluations += flagged.shape[0]
+  return x, y, evaluations
+
+
+class FunctionSamples:
+  def __init__(self, function, l, r, x, y, evaluations) -> None:
+    self.function = function
+    self.l = l
+    self.r = r
+    self.x = x
+    self.y = y
+    self.evaluations = evaluations
+
+  def matches(self, function, l, r) -> bool:
+    return self.function is function and self.l == l and self.r == r
+
+  def __len__(self) -> int:
+    return self.x.shape[0]
+
+  def __repr__(self) -> str:
+    return f"FunctionSamples({len(self)} points on [{self.l}, {self.r}])"
+
+
+def sampleFunction(function, l, r, n=DEFAULT_POINTS, budget=DEFAULT_REFINE_BUDGET) -> FunctionSamples:
+  x = np.linspace(l, r, n)
+  y = evaluate(function, x)
+  x, y, evaluations = refineSamples(function, x, y, budget)
+  return FunctionSamples(function, l, r, x, y, n + evaluations)
+
+
+def gridStep(l, r, points) -> float:
+  return float(2.0 ** np.floor(np.log2((r - l) / points)))
+
+
+class SampleCache:
+  def __init__(self, capacity=GRID_CACHE_SIZE) -> None:
+    self.capacity = capacity
+    self.entries = OrderedDict()
+    self.lock = threading.Lock()
+
+  def get(self, key):
+    with self.lock:
+      entry = self.entries.get(key)
+      if entry is not None:
+        self.entries.move_to_end(key)
+      return entry
+
+  def put(self, key, first, values) -> None:
+    with self.lock:
+      self.entries[key] = (first, values)
+      self.entries.move_to_end(key)
+      while len(self.entries) > self.capacity:
+        self.entries.popitem(last=False)
+
+  def evaluate(self, function, step, first, last, cancelled=None):
+    chunks = []
+    for start in range(first, last + 1, GRID_CHUNK):
+      if cancelled is not None and cancelled():
+        return None
+      k = np.arange(start, min(start + GRID_CHUNK, last + 1))
+      chunks.append(evaluate(function, k * step))
+    return np.concatenate(chunks) if chunks else np.empty(0)
+
+  def sample(self, function, l, r, points, cancelled=None):
+    step = gridStep(l, r, points)
+    first, last = int(np.floor(l / step)), int(np.ceil(r / step))
+    key = (getattr(function, 'text', function), step)
+    cached = self.get(key)
+    if cached is not None:
+      cached_first, values = cached
+      cached_last = cached_first + len(values) - 1
+      low, high = min(first, cached_first), max(last, cached_last)
+      if first > cached_last + 1 or last < cached_first - 1 or high - low > GRID_SPAN_LIMIT * points:
+        cached = None
+    if cached is None:
+      values = self.evaluate(function, step, first, last, cancelled)
+      if values is None:
+        return None
+      low = first
+    else:
+      before = self.evaluate(function, step, low, cached_first - 1, cancelled)
+      after = self.evaluate(function, step, cached_last + 1, high, cancelled)
+      if before is None or after is None:
+        return None
+      values = np.concatenate((before, values, after))
+    self.put(key, low, values)
+    return np.arange(first, last + 1) * step, values[first - low:last - low + 1]
@@ -0,0 +1,197 @@
+import multiprocessing
+import time
+
+import numpy as np
+
+from algorithm_consistent import GenAlgorithm, MaximaArchive, Population, convergenceReason
+
+DEFAULT_MIGRATION_INTERVAL = 5
+DEFAULT_MIGRATION_SIZE = 1
+DEFAULT_TOPOLOGY = 'ring'
+
+
+def ringSources(island: int, islands: int):
+  return [(island - 1) % islands]
+
+def completeSources(island: int, islands: int):
+  return [source for source in range(islands) if source != island]
+
+def starSources(island: int, islands: int):
+  return completeSources(0, islands) if island == 0 else [0]
+
+TOPOLOGIES = {
+  'ring': ringSources,
+  'complete': completeSources,
+  'star': starSources,
+}
+
+
+def islandWorker(connection, params) -> None:
+  algorithm = GenAlgorithm(**params)
+  while True:
+    command, payload = connection.recv()
+    if command == 'start':
+      algorithm.archive = payload
+      algorithm.start()
+      connection.send((algorithm.emigrants(0), np.max(algorithm.population.fitness)))
+    elif command == 'evolve':
+      epochs, migrants, count = payload
+      algorithm.immigrate(migrants)
+      best_fitness = []
+      for _ in range(epochs):
+        algorithm.step()
+        best_fitness.append(np.max(algorithm.population.fitness))
+      connection.send((algorithm.emigrants(count), algorithm.stats[-1][1], best_fitness,
+                       algorithm.population.x, algorithm.evaluations))
+    elif command == 'finish':
+      algorithm.finish()
+      connection.send((algorithm.last_entry, algorithm.history_x, algorithm.history_y, algorithm.evaluations, algorithm.refine_evaluations, algorithm.stats))
+      algorithm.history_x = []
+      algorithm.history_y = []
+      algorithm.stats = []
+    else:
+      break
+  connection.close()
+
+
+def combineStats(rows):
+  rows = np.array(rows, dtype=np.float64)
+  mean = np.nanmean(rows[:, 0])
+  std = np.sqrt(max(np.nanmean(rows[:, 3] ** 2 + rows[:, 0] ** 2) - mean ** 2, 0.0))
+  return (float(mean), float(np.nanmax(rows[:, 1])), float(np.nanmin(rows[:, 2])), float(std))
+
+
+class IslandModel:
+  def __init__(self, islands, max_epochs, population_size, left_border, right_border, function,
+               p_crossover, p_mutation, tournment_opponents, alpha, sigma_share, seed,
+               migration_interval=DEFAULT_MIGRATION_INTERVAL, migration_size=DEFAULT_MIGRATION_SIZE,
+               topology=DEFAULT_TOPOLOGY, stagnation_window=None, spread_tolerance=None,
+               evaluation_budget=None, time_budget=None, **options) -> None:
+    if topology not in TOPOLOGIES:
+      raise ValueError(f"Unknown migration topology: {topology}")
+    self.islands = islands
+    self.max_epochs = max_epochs
+    self.population_size = population_size * islands
+    self.sigma_share = sigma_share
+    self.migration_interval = max(1, migration_interval)
+    self.migration_size = migration_size
+    self.sources = [TOPOLOGIES[topology](island, islands) for island in range(islands)]
+    self.stagnation_window = stagnation_window
+    self.spread_tolerance = spread_tolerance
+    self.evaluation_budget = evaluation_budget
+    self.time_budget = time_budget
+
+    self.params = dict(max_epochs=max_epochs, population_size=population_size,
+                       left_border=left_border, right_border=right_border, function=function,
+                       p_crossover=p_crossover, p_mutation=p_mutation,
+                       tournment_opponents=tournment_opponents, alpha=alpha, sigma_share=sigma_share, **options)
+    self.seeds = np.random.SeedSequence(seed).spawn(islands)
+
+    self.history_x = []
+    self.history_y = []
+    self.stats = []
+    self.archive = MaximaArchive(sigma_share)
+    self.evaluations = 0
+    self.refine_evaluations = 0
+    self.stop_reason = 'max_epochs'
+    self.epochs_used = max_epochs
+    self.iterations_done = 0
+    self.found = 0
+    self.connections = []
+    self.processes = []
+
+  def __enter__(self) -> 'IslandModel':
+    for island, seed in enumerate(self.seeds):
+      parent, child = multiprocessing.Pipe()
+      params = dict(self.params, seed=seed, grid_offset=island / self.islands)
+      process = multiprocessing.Process(target=islandWorker, args=(child, params), daemon=True)
+      process.start()
+      child.close()
+      self.connections.append(parent)
+      self.processes.append(process)
+    return self
+
+  def __exit__(self, *exc) -> None:
+    for connection in self.connections:
+      try:
+        connection.send(('stop', None))
+      except (BrokenPipeError, OSError):
+        pass
+      connection.close()
+    for process in self.processes:
+      process.join()
+    self.connections = []
+    self.processes = []
+
+  @property
+  def history_max(self):
+    return self.archive.points(True)
+
+  @property
+  def strange_dots(self):
+    return self.archive.points(False)
+
+  @property
+  def maxima_table(self):
+    return self.archive.table(True)
+
+  @property
+  def strange_table(self):
+    return self.archive.table(False)
+
+  def broadcast(self, messages):
+    for connection, message in zip(self.connections, messages):
+      connection.send(message)
+    return [connection.recv() for connection in self.connections]
+
+  def migrants(self, emigrants):
+    incoming = []
+    for sources in self.sources:
+      migrants = Population(np.empty(0))
+      for source in sources:
+        migrants = migrants.concat(emigrants[source])
+      incoming.append(migrants)
+    return incoming
+
+  def fit(self, progress=None):
+    started = time.perf_counter()
+    start_evaluations = self.evaluations
+    known = len(self.history_max)
+    replies = self.broadcast([('start', self.archive)] * self.islands)
+    emigrants = [reply[0] for reply in replies]
+    best_fitness = [max(reply[1] for reply in replies)]
+    self.stop_reason = 'max_epochs'
+    epoch = 0
+    while epoch < self.max_epochs:
+      epochs = min(self.migration_interval, self.max_epochs - epoch)
+      replies = self.broadcast([('evolve', (epochs, migrants, self.migration_size))
+                                for migrants in self.migrants(emigrants)])
+      emigrants = [reply[0] for reply in replies]
+      epoch += epochs
+      if progress is not None:
+        progress(epoch, np.nanmax([reply[1] for reply in replies]))
+      best_fitness += np.max([reply[2] for reply in replies], axis=0).tolist()
+      reason = convergenceReason(best_fitness, np.concatenate([reply[3] for reply in replies]),
+                                 sum(reply[4] for reply in replies) - start_evaluations, time.perf_counter() - started,
+                                 self.stagnation_window, self.spread_tolerance, self.evaluation_budget, self.time_budget)
+      if reason is not None:
+        self.stop_reason = reason
+        break
+    self.epochs_used = epoch
+
+    results = self.broadcast([('finish', None)] * self.islands)
+    self.evaluations = sum(result[3] for result in results)
+    self.refine_evaluations = sum(result[4] for result in results)
+    for k in range(len(results[0][1])):
+      self.history_x.append(np.concatenate([result[1][k] for result in results]))
+      self.history_y.append(np.concatenate([result[2][k] for result in results]))
+    for k in range(len(results[0][5])):
+      self.stats.append(combineStats([result[5][k] for result in results]))
+
+    for (x, y, is_max), *_ in results:
+      self.archive.add(x, y, is_max, iteration=self.iterations_done, spent=self.evaluations)
+    self.iterations_done += 1
+
+    found = self.history_max[known:]
+    self.found = len(found)
+    return found[-1] if found else None
@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+from bisect import bisect_right
+
+import numpy as np
+
+
+def populationsPath(directory: str, iteration: int) -> str:
+  return os.path.join(directory, f'populations_{iteration}.npy')
+
+def maximaPath(directory: str, iteration: int) -> str:
+  return os.path.join(directory, f'maxima_{iteration}.npz')
+
+
+class RunHistory:
+  def __init__(self) -> None:
+    self.directory = tempfile.mkdtemp(prefix='ga_history_')
+    self.iterations = 0
+
+  def record(self, iteration: int, history_x, history_y, stats, history_max, found: int) -> None:
+    populations = np.lib.format.open_memmap(populationsPath(self.directory, iteration), mode='w+', dtype=np.float64,
+                                            shape=(2, len(history_x), len(history_x[0])))
+    populations[0] = history_x
+    populations[1] = history_y
+    populations.flush()
+    del populations
+    np.savez(maximaPath(self.directory, iteration), maxima=np.array(history_max, dtype=np.float64).reshape(-1, 2),
+             found=found, stats=np.array(stats, dtype=np.float64).reshape(-1, 4))
+    self.iterations = iteration + 1
+
+  def close(self) -> None:
+    shutil.rmtree(self.directory, ignore_errors=True)
+
+  def __enter__(self) -> 'RunHistory':
+    return self
+
+  def __exit__(self, *exc) -> None:
+    self.close()
+
+
+class HistorySource:
+  def __init__(self) -> None:
+    self.completed = np.empty((0, 4))
+
+  def statsUntil(self, iteration: int, generation: int) -> np.ndarray:
+    completed = sum(self.iterationStats(k).shape[0] for k in range(iteration))
+    if self.completed.shape[0] != completed:
+      self.completed = np.concatenate([self.iterationStats(k) for k in range(iteration)] + [np.empty((0, 4))])
+    return np.concatenate((self.completed, self.iterationStats(iteration)[:generation + 1]))
+
+
+class HistoryReader(HistorySource):
+  def __init__(self, directory: str) -> None:
+    super().__init__()
+    self.directory = directory
+    self.populations = {}
+    self.maxima = {}
+    self.stats = {}
+
+  def population(self, iteration: int) -> np.ndarray:
+    if iteration not in self.populations:
+      self.populations[iteration] = np.load(populationsPath(self.directory, iteration), mmap_mode='r')
+    return self.populations[iteration]
+
+  def foundMaxima(self, iteration: int):
+    if iteration not in self.maxima:
+      with np.load(maximaPath(self.directory, iteration)) as data:
+        self.maxima[iteration] = (data['maxima'], int(data['found']))
+        self.stats[iteration] = data['stats']
+    return self.maxima[iteration]
+
+  def iterationStats(self, iteration: int) -> np.ndarray:
+    self.foundMaxima(iteration)
+    return self.stats[iteration]
+
+
+class RunRecording(HistorySource):
+  def __init__(self, l, r, x_func, y_func) -> None:
+    super().__init__()
+    self.l = l
+    self.r = r
+    self.x_func = x_func
+    self.y_func = y_func
+    self.populations = []
+    self.maxima = []
+    self.stats = []
+    self.frame_starts = [0]
+    self.finished = False
+
+  @property
+  def iterations(self) -> int:
+    return len(self.populations)
+
+  def record(self, iteration: int, history_x, history_y, stats, history_max, found: int) -> None:
+    populations = np.empty((2, len(history_x), len(history_x[0])), dtype=np.float64)
+    populations[0] = history_x
+    populations[1] = history_y
+    self.populations.append(populations)
+    self.maxima.append((np.array(history_max, dtype=np.float64).reshape(-1, 2), found))
+    self.stats.append(np.array(stats, dtype=np.float64).reshape(-1, 4))
+    self.frame_starts.append(self.frame_starts[-1] + populations.shape[1] - 1)
+
+  def population(self, iteration: int) -> np.ndarray:
+    return self.populations[iteration]
+
+  def foundMaxima(self, iteration: int):
+    return self.maxima[iteration]
+
+  def iterationStats(self, iteration: int) -> np.ndarray:
+    return self.stats[iteration]
+
+  def frameCount(self) -> int:
+    return self.frame_starts[-1]
+
+  def iterationStart(self, iteration: int) -> int:
+    return self.frame_starts[iteration]
+
+  def locate(self, frame: int):
+    iteration = min(bisect_right(self.frame_starts, frame) - 1, self.iterations - 1)
+    return iteration, frame - self.frame_starts[iteration]
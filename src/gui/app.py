@@ -1,33 +1,23 @@
 import os
 import sys
-import shutil
 from PyQt6.QtWidgets import QApplication, QStackedWidget, QMainWindow
 from PyQt6.QtGui import QPalette, QColor
 from PyQt6.QtCore import Qt
 from main_menu import MainMenu
 from results import Results
 from visualisation import Visualisation
+from frame_archive import removeArchive, FRAMES_DIRECTORY
 
 
-def clean_frames_folder():
-    folder = 'frames'
-    if not os.path.exists(folder):
+def clean_frames_folder(archive=None):
+    if archive:
+        removeArchive(archive)
         return
 
-    for filename in os.listdir(folder):
-        file_path = os.path.join(folder, filename)
-        try:
-            if os.path.isfile(file_path):
-                os.unlink(file_path)
-            elif os.path.isdir(file_path):
-                shutil.rmtree(file_path)
-        except Exception as e:
-            print(f"Ошибка удаления {file_path}: {e}")
-
     try:
-        shutil.rmtree(folder)
-    except Exception as e:
-        print(f"Ошибка удаления {folder}: {e}")
+        os.rmdir(FRAMES_DIRECTORY)
+    except OSError:
+        pass
 
 
 class MainWindow(QMainWindow):
@@ -69,7 +59,7 @@ class MainWindow(QMainWindow):
 
         self.main_menu = MainMenu(self)
         self.results = Results(self)
-        self.visualisation = Visualisation(self, 5, 15)
+        self.visualisation = Visualisation(self)
 
         self.stacked_widget.addWidget(self.main_menu)
         self.stacked_widget.addWidget(self.results)
@@ -80,7 +70,9 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("Genetic Algorithm")
 
     def closeEvent(self):
-        clean_frames_folder()
+        self.visualisation.stop_prefetch()
+        self.main_menu.preview_worker.stop()
+        clean_frames_folder(getattr(self.current_results, 'frame_archive', None))
         quit()
 
     def switch_to_main_menu(self):
@@ -95,8 +87,7 @@ class MainWindow(QMainWindow):
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
-    app.aboutToQuit.connect(clean_frames_folder)
-
     main_window = MainWindow(app)
+    app.aboutToQuit.connect(lambda: clean_frames_folder(getattr(main_window.current_results, 'frame_archive', None)))
     main_window.show()
     sys.exit(app.exec())
@@ -1,58 +1,120 @@
 import sys
+import math
 import random
 import numbers
 
 
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QLabel, QPushButton,
+    QApplication, QWidget, QVBoxLayout, QLabel, QPushButton,
     QLineEdit, QHBoxLayout, QScrollArea, QFrame, QSizePolicy, QFileDialog, QMessageBox, QDialog
 )
 from PyQt6.QtCore import Qt, QTimer, QThread, QObject, pyqtSignal
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import algorithm_consistent
-import math
+import expression_compiler
+from function_sampler import FunctionSamples, SampleCache, refineSamples, DEFAULT_REFINE_BUDGET
 import re
 from visualisation import Visualisation
+from frame_archive import removeArchive, FRAMES_DIRECTORY
 
 import os
-import shutil
+import time
+import threading
 
-def clean_frames_folder():
-    folder = 'frames'
-    if not os.path.exists(folder):
-        return
+PROGRESS_INTERVAL = 0.1
+PREVIEW_DELAY = 150
+PREVIEW_POINTS = 1000
 
-    for filename in os.listdir(folder):
-        file_path = os.path.join(folder, filename)
-        try:
-            if os.path.isfile(file_path):
-                os.unlink(file_path)
-            elif os.path.isdir(file_path):
-                shutil.rmtree(file_path)
-        except Exception as e:
-            print(f"Ошибка удаления {file_path}: {e}")
+def clean_frames_folder(archive=None):
+    if archive:
+        removeArchive(archive)
+        return
 
     try:
-        shutil.rmtree(folder)
-    except Exception as e:
-        print(f"Ошибка удаления {folder}: {e}")
+        os.rmdir(FRAMES_DIRECTORY)
+    except OSError:
+        pass
 
 class AlgorithmWorker(QObject):
     finished = pyqtSignal(object)
     error = pyqtSignal(str)
+    progress = pyqtSignal(object)
 
     def __init__(self, params):
         super().__init__()
         self.params = params
+        self.reported_at = 0.0
+        self.reported_frames = 0
+
+    def report(self, progress):
+        frames = progress.recording.frameCount() if progress.recording is not None else 0
+        now = time.perf_counter()
+        if frames != self.reported_frames or now - self.reported_at >= PROGRESS_INTERVAL:
+            self.reported_frames = frames
+            self.reported_at = now
+            self.progress.emit(progress)
 
     def run(self):
         try:
-            results = algorithm_consistent.run(**self.params)
+            results = algorithm_consistent.run(**self.params, progress=self.report)
             self.finished.emit(results)
         except Exception as e:
             self.error.emit(str(e))
 
+class FunctionPreviewWorker(QThread):
+    samples_ready = pyqtSignal(object, object)
+
+    def __init__(self, cache):
+        super().__init__()
+        self.cache = cache
+        self.condition = threading.Condition()
+        self.target = None
+        self.stopped = False
+
+    def request(self, func, left, right):
+        with self.condition:
+            self.target = (func, left, right)
+            self.condition.notify()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        self.wait()
+
+    def interrupted(self):
+        with self.condition:
+            return self.stopped or self.target is not None
+
+    def sample(self, func, left, right):
+        grid = self.cache.sample(func, left, right, PREVIEW_POINTS, self.interrupted)
+        if grid is None:
+            return None
+
+        x, y, evaluations = refineSamples(func, *grid, DEFAULT_REFINE_BUDGET, self.interrupted)
+        if self.interrupted():
+            return None
+        return FunctionSamples(func, left, right, x, y, x.shape[0])
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.target is None and not self.stopped:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                target, self.target = self.target, None
+
+            try:
+                samples = self.sample(*target)
+            except Exception as e:
+                print(f"Error sampling function: {e}")
+                continue
+            if samples is not None:
+                self.samples_ready.emit(target, samples)
+
+
 class MainMenu(QWidget):
     def __init__(self, app):
         super().__init__()
@@ -60,8 +122,18 @@ class MainMenu(QWidget):
         self.do_visualisation = True
         self.is_algorithm_running = False
         self.app = app
+        self.preview_target = None
+        self.preview_samples = None
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(PREVIEW_DELAY)
+        self.preview_timer.timeout.connect(self.update_function_plot)
+        self.preview_worker = FunctionPreviewWorker(SampleCache())
+        self.preview_worker.samples_ready.connect(self.plot_samples)
+        QApplication.instance().aboutToQuit.connect(self.preview_worker.stop)
+        self.preview_worker.start()
         self.initUI()
-        self.polinom = lambda x: math.sin(x)/x
+        self.polinom = expression_compiler.compileExpression("sin(x)/x")
         
     def initUI(self):
         self.setStyleSheet("""
@@ -99,6 +171,17 @@ class MainMenu(QWidget):
             QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding
         )
 
+        self.figure.set_facecolor('#ECE9E9')
+        self.function_axes = self.figure.add_subplot(111)
+        self.function_line, = self.function_axes.plot([], [], 'b-')
+        self.function_axes.grid(True)
+        self.function_axes.set_xlabel('x')
+        self.function_axes.set_ylabel('f(x)')
+        self.function_axes.set_title('Function Plot', fontdict={
+            'fontsize': 22,
+            'fontweight': 'normal'
+        })
+
         func_vis_layout.addWidget(self.canvas)
         func_vis_frame.setLayout(func_vis_layout)
         
@@ -132,7 +215,7 @@ class MainMenu(QWidget):
             font-size: 20px;
         """)
         self.polynom_input.setPlaceholderText("Enter function (e.g., sin(x)/x or x**2 + 3*x + 2")
-        self.polynom_input.textChanged.connect(self.update_function_plot)
+        self.polynom_input.textChanged.connect(self.preview_timer.start)
 
         generate_btn = QPushButton("Generate")
         generate_btn.setStyleSheet("""
@@ -331,7 +414,7 @@ class MainMenu(QWidget):
         self.left_field.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.left_field.setFixedWidth(80)
         self.left_field.setFixedHeight(50)
-        self.left_field.textChanged.connect(self.update_function_plot)
+        self.left_field.textChanged.connect(self.preview_timer.start)
         
         left_input.addWidget(left_label, alignment=Qt.AlignmentFlag.AlignCenter)
         left_input.addWidget(self.left_field, alignment=Qt.AlignmentFlag.AlignCenter)
@@ -358,7 +441,7 @@ class MainMenu(QWidget):
         self.right_field.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.right_field.setFixedWidth(80)
         self.right_field.setFixedHeight(50)
-        self.right_field.textChanged.connect(self.update_function_plot)
+        self.right_field.textChanged.connect(self.preview_timer.start)
         
         right_input.addWidget(right_label, alignment=Qt.AlignmentFlag.AlignCenter)
         right_input.addWidget(self.right_field, alignment=Qt.AlignmentFlag.AlignCenter)
@@ -413,7 +496,7 @@ class MainMenu(QWidget):
                     sigma_share = None
 
                 if self.do_visualisation == False:
-                    clean_frames_folder()
+                    clean_frames_folder(getattr(self.app.current_results, 'frame_archive', None))
 
                 self.create_loading_overlay()
                 params = {
@@ -428,15 +511,18 @@ class MainMenu(QWidget):
                     'tournment_opponents': int(self.param_inputs["Tournament opponents"].text()),
                     'alpha': float(self.param_inputs["Alpha"].text()),
                     'sigma_share': sigma_share,
-                    'visualize': self.do_visualisation
+                    'visualize': self.do_visualisation,
+                    'samples': self.preview_samples
                 }
                 self.is_algorithm_running = True
+                self.live_visualisation = False
                 self.worker = AlgorithmWorker(params)
                 self.thread = QThread()
                 self.worker.moveToThread(self.thread)
 
                 self.worker.finished.connect(self.on_algorithm_finished)
                 self.worker.error.connect(self.on_algorithm_error)
+                self.worker.progress.connect(self.on_algorithm_progress)
                 self.thread.started.connect(self.worker.run)
                 self.worker.finished.connect(self.thread.quit)
                 self.worker.error.connect(self.thread.quit)
@@ -493,20 +579,40 @@ class MainMenu(QWidget):
 
         self.loading_overlay.close()
 
-        iterations = int(self.param_inputs["Iterations"].text())
-        max_epochs = int(self.param_inputs["Epochs"].text())
-        if self.do_visualisation:
-            self.app.visualisation = Visualisation(self.app, iterations, max_epochs)
-            self.app.stacked_widget.removeWidget(self.app.stacked_widget.widget(2))
-            self.app.stacked_widget.addWidget(self.app.visualisation)
-            self.app.stacked_widget.addWidget(self.app.results)
-            self.app.switch_to_visualisation()
+        if self.live_visualisation:
+            self.app.visualisation.refresh_frames()
+        elif self.do_visualisation:
+            self.show_visualisation(results.recording)
         else:
             if hasattr(self.app, 'visualisation'):
+                self.app.visualisation.stop_prefetch()
                 self.app.visualisation.clear_visualization()
             self.app.stacked_widget.addWidget(self.app.results)
             self.app.switch_to_results()
 
+    def show_visualisation(self, recording):
+        self.app.visualisation.stop_prefetch()
+        self.app.visualisation = Visualisation(self.app, recording)
+        self.app.stacked_widget.removeWidget(self.app.stacked_widget.widget(2))
+        self.app.stacked_widget.addWidget(self.app.visualisation)
+        self.app.stacked_widget.addWidget(self.app.results)
+        self.app.switch_to_visualisation()
+
+    def on_algorithm_progress(self, progress):
+        eta = f"{progress.eta:.0f} s" if progress.eta is not None else "-"
+        self.progress_label.setText(f"Iteration {progress.iteration + 1}, epoch {progress.epoch}\n"
+                                    f"Best: {progress.best:.4g}, maxima: {len(progress.maxima)}, ETA: {eta}")
+
+        recording = progress.recording
+        if not self.do_visualisation or recording is None or recording.frameCount() == 0:
+            return
+        if self.live_visualisation:
+            self.app.visualisation.refresh_frames()
+        else:
+            self.live_visualisation = True
+            self.loading_overlay.close()
+            self.show_visualisation(recording)
+
     def on_algorithm_error(self, error_msg):
         print(f"Algorithm error: {error_msg}")
         if hasattr(self, 'loading_overlay'):
@@ -535,7 +641,7 @@ class MainMenu(QWidget):
             border-radius: 10px;
             padding: 10px;
         """)
-        message_box.setFixedSize(300, 150)
+        message_box.setFixedSize(300, 190)
 
         layout = QVBoxLayout(message_box)
         layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -557,6 +663,14 @@ class MainMenu(QWidget):
         """)
         self.spinner_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
+        self.progress_label = QLabel("")
+        self.progress_label.setStyleSheet("""
+            color: white;
+            font-family: Arial;
+            font-size: 12px;
+        """)
+        self.progress_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
         self.spinner_counter = 0
         self.spinner_timer = QTimer()
         self.spinner_timer.timeout.connect(self.update_spinner)
@@ -564,6 +678,7 @@ class MainMenu(QWidget):
 
         layout.addWidget(loading_label)
         layout.addWidget(self.spinner_label)
+        layout.addWidget(self.progress_label)
         message_box.setLayout(layout)
 
         message_box.move(
@@ -596,7 +711,7 @@ class MainMenu(QWidget):
             try:
                 func = self.create_lambda(func_str)
             except:
-                func = lambda x: math.sin(x) / x
+                func = expression_compiler.compileExpression("sin(x)/x")
 
             try:
                 left = float(self.left_field.text())
@@ -607,6 +722,13 @@ class MainMenu(QWidget):
             except:
                 right = 10
 
+            if not (math.isfinite(left) and math.isfinite(right)):
+                self.preview_target = None
+                self.preview_samples = None
+                self.function_line.set_data([], [])
+                self.canvas.draw_idle()
+                return
+
             if right <= left:
                 right = left + 1
             
@@ -614,25 +736,21 @@ class MainMenu(QWidget):
             self.app.left_border = left
             self.app.right_border = right
 
-            x, y = algorithm_consistent.getFunctionDots(1000, left, right, func)
-
-            self.figure.clear()
-            self.figure.set_facecolor('#ECE9E9')
-            ax = self.figure.add_subplot(111)
-            ax.plot(x, y, 'b-')
-            ax.grid(True)
-            ax.set_xlabel('x')
-            ax.set_ylabel('f(x)')
-
-            ax.set_title('Function Plot', fontdict={
-                'fontsize': 22,
-                'fontweight': 'normal'
-            })
-
-            self.canvas.draw()
+            self.preview_target = (func, left, right)
+            self.preview_worker.request(func, left, right)
 
         except Exception as e:
             print(f"Error plotting function: {e}")
+
+    def plot_samples(self, target, samples):
+        if target != self.preview_target:
+            return
+        self.preview_samples = samples
+        self.function_line.set_data(samples.x, samples.y)
+        self.function_axes.set_xlim(samples.l, samples.r)
+        self.function_axes.relim()
+        self.function_axes.autoscale_view(scalex=False)
+        self.canvas.draw_idle()
     
     def generate_random_polinomial(self):
         result = ''
@@ -659,14 +777,7 @@ class MainMenu(QWidget):
             return ""
 
     def create_lambda(self, func_str):
-        func_str = func_str.replace('^', '**')
-
-        math_funcs = ['sin', 'cos', 'tan', 'log', 'exp', 'sqrt', 'pi', 'e']
-        for func in math_funcs:
-            if func in func_str and f'math.{func}' not in func_str:
-                func_str = func_str.replace(func, f'math.{func}')
-
-        return eval(f'lambda x: {func_str}')
+        return expression_compiler.compileExpression(func_str)
     
     def create_navbar(self, active_tab):
         navbar = QWidget()
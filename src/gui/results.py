@@ -1,12 +1,82 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas, NavigationToolbar2QT
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QLabel, QHBoxLayout, QPushButton, QFrame, QTableWidget, QTableWidgetItem,
+    QWidget, QVBoxLayout, QLabel, QHBoxLayout, QPushButton, QFrame, QTableView, QComboBox,
     QHeaderView, QAbstractItemView, QSizePolicy, QScrollArea
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer, QAbstractTableModel, QModelIndex
 from PyQt6.QtGui import QFont
+from matplotlib.transforms import Bbox
+
+from function_sampler import SampleCache, refineSamples, sampleFunction
+
+LOD_DELAY = 120
+HOVER_RADIUS = 12
+HOVER_INTERVAL = 16
+BLIT_PADDING = 4
+ROW_HEIGHT = 60
+
+TABLE_VIEWS = ("Found maxima", "Strange dots")
+TABLE_COLUMNS = (
+    ("x", lambda value: f"{value:.6f}"),
+    ("f(x)", lambda value: f"{value:.6f}"),
+    ("Iteration", lambda value: f"{value + 1:.0f}"),
+    ("Evaluations", lambda value: f"{value:.0f}"),
+)
+
+
+def point_table(points):
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    return np.column_stack((points, np.full((points.shape[0], len(TABLE_COLUMNS) - 2), np.nan)))
+
+
+class PointTableModel(QAbstractTableModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.table = point_table([])
+        self.order = np.empty(0, dtype=int)
+        self.font = QFont("Inter", 18)
+
+    def set_table(self, table):
+        self.beginResetModel()
+        self.table = table
+        self.order = np.arange(table.shape[0])
+        self.endResetModel()
+
+    def point(self, row):
+        k = self.order[row]
+        return (float(self.table[k, 0]), float(self.table[k, 1]))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.order.shape[0]
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(TABLE_COLUMNS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole:
+            value = self.table[self.order[index.row()], index.column()]
+            return TABLE_COLUMNS[index.column()][1](value) if np.isfinite(value) else "-"
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return Qt.AlignmentFlag.AlignCenter
+        if role == Qt.ItemDataRole.FontRole:
+            return self.font
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return TABLE_COLUMNS[section][0]
+        return None
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        if column < 0:
+            return
+        self.beginResetModel()
+        self.order = np.argsort(self.table[:, column], kind='stable')
+        if order == Qt.SortOrder.DescendingOrder:
+            self.order = self.order[::-1]
+        self.endResetModel()
 
 
 class Results(QWidget):
@@ -14,7 +84,24 @@ class Results(QWidget):
         super().__init__()
         self.app = app
         self.max_points = []
+        self.tables = [point_table([]), point_table([])]
         self.current_annotation = None
+        self.annotation_bbox = None
+        self.hover_background = None
+        self.hover_pixels = np.empty((0, 2))
+        self.hover_order = np.empty(0, dtype=int)
+        self.hover_event = None
+        self.hover_timer = QTimer(self)
+        self.hover_timer.setSingleShot(True)
+        self.hover_timer.setInterval(HOVER_INTERVAL)
+        self.hover_timer.timeout.connect(self.process_hover)
+        self.function_line = None
+        self.full_samples = None
+        self.sample_cache = SampleCache()
+        self.lod_timer = QTimer(self)
+        self.lod_timer.setSingleShot(True)
+        self.lod_timer.setInterval(LOD_DELAY)
+        self.lod_timer.timeout.connect(self.update_detail)
         self.initUI()
     
     def initUI(self):
@@ -46,7 +133,11 @@ class Results(QWidget):
         self.canvas = FigureCanvas(fig)
         graph_layout.addWidget(self.canvas)
 
+        self.toolbar = NavigationToolbar2QT(self.canvas, self)
+        graph_layout.addWidget(self.toolbar)
+
         self.canvas.mpl_connect('motion_notify_event', self.on_mouse_move)
+        self.canvas.mpl_connect('draw_event', self.on_draw)
 
         content_layout.addWidget(graph_area)
 
@@ -59,22 +150,33 @@ class Results(QWidget):
         title_label.setFont(QFont("Inter", 32, QFont.Weight.Bold))
         title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         table_layout.addWidget(title_label)
+
+        self.table_selector = QComboBox()
+        self.table_selector.addItems(TABLE_VIEWS)
+        self.table_selector.setStyleSheet("background-color: white; color: black; font-size: 20px;")
+        self.table_selector.currentIndexChanged.connect(self.show_table)
+        table_layout.addWidget(self.table_selector)
         
-        self.results_table = QTableWidget()
-        self.results_table.setColumnCount(1)
-        self.results_table.setHorizontalHeaderLabels(["Found maximum"])
+        self.table_model = PointTableModel(self)
+        self.results_table = QTableView()
+        self.results_table.setModel(self.table_model)
         
         header = self.results_table.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        header.setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         header.setFont(QFont("Inter", 20, QFont.Weight.Bold))
         header.setDefaultAlignment(Qt.AlignmentFlag.AlignCenter)
+        header.setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.results_table.setSortingEnabled(True)
         
-        self.results_table.verticalHeader().setVisible(False)
+        rows = self.results_table.verticalHeader()
+        rows.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        rows.setDefaultSectionSize(ROW_HEIGHT)
+        rows.setVisible(False)
         self.results_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
         self.results_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         
         self.results_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: white;
                 border: 1px solid #cccccc;
                 border-radius: 10px;
@@ -87,14 +189,14 @@ class Results(QWidget):
                 font-size: 20px;
                 border: none;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 15px;
                 font-size: 20px;
             }
         """)
         
         self.results_table.setMinimumHeight(400)
-        self.results_table.cellClicked.connect(self.on_row_clicked)
+        self.results_table.clicked.connect(self.on_row_clicked)
         table_layout.addWidget(self.results_table)
 
         relaunch_btn = QPushButton("Re-launch Algorithm")
@@ -128,70 +230,92 @@ class Results(QWidget):
     def relaunch_algorithm(self):
         self.app.main_menu.launch_algorithm()
     
-    def on_mouse_move(self, event):
-        if event.inaxes is not None:
-            xdata, ydata = event.xdata, event.ydata
-            points = [(x, y) for x, y in self.max_points]
-            threshold = 0.5
-            
-            closest_point = None
-            min_distance = float('inf')
+    def on_draw(self, event):
+        self.hover_background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self.build_hover_index()
+        self.annotation_bbox = None
+        if self.current_annotation is not None and self.current_annotation.get_visible():
+            self.canvas.figure.draw_artist(self.current_annotation)
+            self.annotation_bbox = self.current_annotation.get_window_extent(self.canvas.get_renderer())
+
+    def build_hover_index(self):
+        if not self.canvas.figure.axes or len(self.max_points) == 0:
+            self.hover_pixels = np.empty((0, 2))
+            self.hover_order = np.empty(0, dtype=int)
+            return
+        points = np.asarray(self.max_points, dtype=np.float64).reshape(-1, 2)
+        pixels = self.canvas.figure.axes[0].transData.transform(points)
+        self.hover_order = np.argsort(pixels[:, 0], kind='stable')
+        self.hover_pixels = pixels[self.hover_order]
 
-            for point in points:
-                dist = ((point[0] - xdata)**2 + (point[1] - ydata)**2)**0.5
-                if dist < min_distance:
-                    min_distance = dist
-                    closest_point = point
+    def nearest_point(self, px, py):
+        low = np.searchsorted(self.hover_pixels[:, 0], px - HOVER_RADIUS, side='left')
+        high = np.searchsorted(self.hover_pixels[:, 0], px + HOVER_RADIUS, side='right')
+        if low == high:
+            return None
+        window = self.hover_pixels[low:high]
+        distances = np.hypot(window[:, 0] - px, window[:, 1] - py)
+        closest = int(np.argmin(distances))
+        if distances[closest] > HOVER_RADIUS:
+            return None
+        return self.max_points[self.hover_order[low + closest]]
 
-            if min_distance <= threshold:
-                self.annotate_point(closest_point)
-            else:
-                self.remove_annotation()
+    def on_mouse_move(self, event):
+        if event.inaxes is None:
+            return
+        self.hover_event = (event.x, event.y)
+        if not self.hover_timer.isActive():
+            self.hover_timer.start()
 
-    def annotate_point(self, point):
-        ax = self.canvas.figure.axes[0]
-        if self.current_annotation:
+    def process_hover(self):
+        if self.hover_event is None:
+            return
+        point = self.nearest_point(*self.hover_event)
+        if point is not None:
+            self.annotate_point(point)
+        else:
             self.remove_annotation()
 
-        annotation = ax.annotate(
-            f"({point[0]:.2f}, {point[1]:.2f})",
-            xy=point,
-            xytext=(10, 10),
-            textcoords="offset pixels",
-            bbox=dict(boxstyle="round,pad=0.3", fc="w", ec="k", lw=1),
-            arrowprops=dict(facecolor='black', shrink=0.05)
-        )
-        self.current_annotation = annotation
-        self.canvas.draw_idle()
+    def annotate_point(self, point):
+        annotation = self.current_annotation
+        if annotation is None:
+            return
+        if annotation.get_visible() and tuple(annotation.xy) == tuple(point):
+            return
+        annotation.xy = tuple(point)
+        annotation.set_text(f"({point[0]:.2f}, {point[1]:.2f})")
+        annotation.set_visible(True)
+        self.blit_annotation()
 
     def remove_annotation(self):
-        if self.current_annotation:
-            try:
-                self.current_annotation.remove()
-                self.current_annotation = None
-            except Exception:
-                self.current_annotation = None
-            finally:
-                self.canvas.draw_idle()
-
-    def update_results(self, results):
-        self.results_table.setRowCount(0)
-
-        self.results_table.setRowCount(len(results))
+        if self.current_annotation is not None and self.current_annotation.get_visible():
+            self.current_annotation.set_visible(False)
+            self.blit_annotation()
 
-        for i in range(len(results)):
-            self.results_table.setRowHeight(i, 60)
+    def blit_annotation(self):
+        if self.hover_background is None:
+            self.canvas.draw_idle()
+            return
+        regions = [self.annotation_bbox] if self.annotation_bbox is not None else []
+        self.canvas.restore_region(self.hover_background)
+        self.annotation_bbox = None
+        if self.current_annotation.get_visible():
+            self.canvas.figure.draw_artist(self.current_annotation)
+            self.annotation_bbox = self.current_annotation.get_window_extent(self.canvas.get_renderer())
+            regions.append(self.annotation_bbox)
+        if regions:
+            self.canvas.blit(Bbox.union(regions).padded(BLIT_PADDING))
 
-        for i, (x, y) in enumerate(results):
-            max_item = QTableWidgetItem(f"x = {x:.6f}, y = {y:.6f}")
-            max_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            max_item.setFont(QFont("Inter", 18))
-            self.results_table.setItem(i, 0, max_item)
-        
-        self.results_table.resizeColumnsToContents()
+    def update_results(self, results):
+        maxima = getattr(results, 'maxima_table', None)
+        strange = getattr(results, 'strange_table', None)
+        self.tables = [maxima if maxima is not None else point_table(results),
+                       strange if strange is not None else point_table(getattr(results, 'strange_dots', []))]
+        self.show_table(self.table_selector.currentIndex())
         
         self.max_points = results
         self.update_graph(results)
+        self.build_hover_index()
     
     def update_graph(self, data):
         if self.app.polinom is None or len(data) == 0:
@@ -200,13 +324,13 @@ class Results(QWidget):
         self.canvas.figure.clear()
         ax = self.canvas.figure.add_subplot(111)
 
-        x_min = self.app.left_border
-        x_max = self.app.right_border
-        x_range = np.linspace(x_min, x_max, 100)
+        samples = getattr(data, 'samples', None)
+        if samples is None:
+            samples = sampleFunction(self.app.polinom, self.app.left_border, self.app.right_border)
+        x_range, y_values = samples.x, samples.y
+        self.full_samples = samples
 
-        y_values = [self.app.polinom(x_range[i]) for i in range(len(x_range))]
-
-        ax.plot(x_range, y_values, linewidth=2)
+        self.function_line, = ax.plot(x_range, y_values, linewidth=2)
 
         ax.scatter([x for x, _ in data], [y for _, y in data], c='red', s=100, zorder=5, label="Maximal")
 
@@ -214,13 +338,48 @@ class Results(QWidget):
         ax.grid(True)
         ax.set_xlabel("X-axis")
         ax.set_ylabel("Y-axis")
+
+        self.current_annotation = ax.annotate(
+            "",
+            xy=(0, 0),
+            xytext=(10, 10),
+            textcoords="offset pixels",
+            bbox=dict(boxstyle="round,pad=0.3", fc="w", ec="k", lw=1),
+            arrowprops=dict(facecolor='black', shrink=0.05),
+            animated=True,
+            visible=False
+        )
+        self.annotation_bbox = None
+        ax.callbacks.connect('xlim_changed', self.on_limits_changed)
+        self.toolbar.update()
         
         self.canvas.draw()
     
-    def on_row_clicked(self, row, col):
-        if row >= 0 and row < len(self.max_points):
-            point = self.max_points[row]
-            self.annotate_point(point)
+    def on_limits_changed(self, ax):
+        self.lod_timer.start()
+
+    def update_detail(self):
+        if self.function_line is None or not self.canvas.figure.axes:
+            return
+        ax = self.canvas.figure.axes[0]
+        samples = self.full_samples
+        left, right = ax.get_xlim()
+        if left <= samples.l and right >= samples.r:
+            x, y = samples.x, samples.y
+        else:
+            pixels = max(int(ax.bbox.width), 1)
+            x, y = self.sample_cache.sample(samples.function, left, right, pixels)
+            x, y, _ = refineSamples(samples.function, x, y, pixels)
+        self.function_line.set_data(x, y)
+        self.canvas.draw_idle()
+
+    def show_table(self, index):
+        self.results_table.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.table_model.set_table(self.tables[index])
+
+    def on_row_clicked(self, index):
+        if index.isValid():
+            self.annotate_point(self.table_model.point(index.row()))
 
     def create_navbar(self, active_tab):
         navbar = QWidget()
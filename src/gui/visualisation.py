@@ -1,24 +1,174 @@
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QPushButton,
-                             QHBoxLayout, QFrame, QSlider, QLineEdit, QSizePolicy)
-from PyQt6.QtCore import Qt, QTimer
-from PyQt6.QtGui import QIcon, QIntValidator, QPixmap
+from PyQt6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QLabel, QPushButton,
+                             QHBoxLayout, QFrame, QSlider, QLineEdit, QSizePolicy, QComboBox)
+from PyQt6.QtCore import Qt, QTimer, QThread, QSize, pyqtSignal
+from PyQt6.QtGui import QIcon, QIntValidator, QPixmap, QImage
+from collections import OrderedDict, deque
+import threading
+import time
+
+from frame_renderer import FrameRenderer, RESOLUTION_PRESETS, MIN_DPI, fitDpi
+
+IMAGE_CACHE_SIZE = 8
+PIXMAP_CACHE_SIZE = 48
+RENDERER_CACHE_SIZE = 3
+PREFETCH_AHEAD = 8
+PREFETCH_BEHIND = 2
+PREVIEW_SCALE = 0.5
+SETTLE_DELAY = 250
+PLAYBACK_TICK = 10
+PLAYBACK_SPEEDS = (0.25, 0.5, 1, 2, 4, 8)
+FPS_WINDOW = 1.0
+
+
+def to_qimage(image):
+    height, width = image.shape[:2]
+    return QImage(image.data, width, height, image.strides[0], QImage.Format.Format_RGBA8888).copy()
+
+
+class FrameCache:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.images = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __contains__(self, frame):
+        with self.lock:
+            return frame in self.images
+
+    def get(self, frame):
+        with self.lock:
+            images = self.images.get(frame)
+            if images is not None:
+                self.images.move_to_end(frame)
+            return images
+
+    def put(self, frame, images):
+        with self.lock:
+            self.images[frame] = images
+            self.images.move_to_end(frame)
+            while len(self.images) > self.capacity:
+                self.images.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.images.clear()
+
+
+class FramePrefetcher(QThread):
+    frame_ready = pyqtSignal(object, object)
+
+    def __init__(self, recording, pixmaps):
+        super().__init__()
+        self.recording = recording
+        self.pixmaps = pixmaps
+        self.images = FrameCache(IMAGE_CACHE_SIZE)
+        self.renderers = FrameCache(RENDERER_CACHE_SIZE)
+        self.condition = threading.Condition()
+        self.target = None
+        self.stopped = False
+
+    def request(self, frame, direction, sizes, tiers, full=False):
+        with self.condition:
+            self.target = (frame, direction, sizes, tiers, full)
+            self.condition.notify()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        self.wait()
+
+    def neighbours(self, frame, direction):
+        last = self.recording.frameCount() - 1
+        ahead = [frame + direction * k for k in range(PREFETCH_AHEAD + 1)]
+        behind = [frame - direction * k for k in range(1, PREFETCH_BEHIND + 1)]
+        return [k for k in ahead + behind if 0 <= k <= last]
+
+    def interrupted(self):
+        with self.condition:
+            return self.stopped or self.target is not None
+
+    def renderer(self, dpi):
+        renderer = self.renderers.get(dpi)
+        if renderer is None:
+            recording = self.recording
+            renderer = FrameRenderer(recording.l, recording.r, recording.x_func, recording.y_func, dpi=dpi)
+            self.renderers.put(dpi, renderer)
+        return renderer
+
+    def render(self, renderer, frame):
+        iteration, epoch = self.recording.locate(frame)
+        last_iteration = self.recording.finished and iteration + 1 == self.recording.iterations
+        return tuple(to_qimage(image) for image in renderer.render(self.recording, iteration, epoch, last_iteration))
+
+    def scale(self, images, sizes):
+        return tuple(image.scaled(QSize(*size), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+                     for image, size in zip(images, sizes))
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.target is None and not self.stopped:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                (target, direction, sizes, (preview, full_dpi), full), self.target = self.target, None
+
+            jobs = [(target, full_dpi)] if full else []
+            jobs += [(frame, preview) for frame in self.neighbours(target, direction)]
+            for frame, dpi in jobs:
+                if self.interrupted():
+                    break
+                key = (frame, sizes, dpi)
+                if key in self.pixmaps:
+                    continue
+                images = self.images.get((frame, dpi))
+                if images is None:
+                    images = self.render(self.renderer(dpi), frame)
+                    self.images.put((frame, dpi), images)
+                self.frame_ready.emit(key, self.scale(images, sizes))
 
 
 class Visualisation(QWidget):
-    def __init__(self, app, iterations=5, epochs=15):
+    def __init__(self, app, recording=None):
         super().__init__()
         self.app = app
         self.timer = QTimer()
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.setInterval(PLAYBACK_TICK)
         self.timer.timeout.connect(self.update_visualisation)
         self.current_frame = 0
-        self.max_frames = iterations * epochs - 1
+        self.recording = recording
+        self.max_frames = max(recording.frameCount() - 1, 0) if recording else 0
         self.speed = 100
-
-        self.iteration = iterations
-        self.epochs = epochs
+        self.multiplier = 1
+        self.play_started = 0.0
+        self.play_origin = 0
+        self.scheduled_frame = None
+        self.frames_advanced = 0
+        self.frames_shown = 0
+        self.last_shown = None
+        self.shown_times = deque()
+
+        self.iteration = recording.iterations if recording else 1
+        self.finished = recording.finished if recording else True
         self.current_algorithm_img = None
         self.current_average_img = None
 
+        self.direction = 1
+        self.resolution = None
+        self.pixmaps = FrameCache(PIXMAP_CACHE_SIZE)
+        self.settle_timer = QTimer()
+        self.settle_timer.setSingleShot(True)
+        self.settle_timer.setInterval(SETTLE_DELAY)
+        self.settle_timer.timeout.connect(self.render_full)
+        self.prefetcher = None
+        if recording is not None and recording.frameCount() > 0:
+            self.prefetcher = FramePrefetcher(recording, self.pixmaps)
+            self.prefetcher.frame_ready.connect(self.frame_ready)
+            QApplication.instance().aboutToQuit.connect(self.stop_prefetch)
+            self.prefetcher.start()
+
         self.initUI()
         self.load_frame(0)
 
@@ -72,6 +222,11 @@ class Visualisation(QWidget):
         """)
         self.timeline_slider.valueChanged.connect(self.slider_changed)
         timeline_layout.addWidget(self.timeline_slider)
+
+        self.playback_label = QLabel()
+        self.playback_label.setFixedWidth(260)
+        self.playback_label.setStyleSheet("color: black; font-size: 16px; margin-left: 10px;")
+        timeline_layout.addWidget(self.playback_label)
         timeline.setLayout(timeline_layout)
         content_layout.addWidget(timeline)
 
@@ -140,8 +295,27 @@ class Visualisation(QWidget):
         self.speed_input.setStyleSheet("background-color: white; color: black; margin-bottom: 10px; font-size: 20px;")
         self.speed_input.textChanged.connect(self.update_speed)
 
+        self.multiplier_input = QComboBox()
+        self.multiplier_input.addItems([f"{speed:g}x" for speed in PLAYBACK_SPEEDS])
+        self.multiplier_input.setCurrentIndex(PLAYBACK_SPEEDS.index(1))
+        self.multiplier_input.setStyleSheet("background-color: white; color: black; margin-bottom: 10px; font-size: 20px;")
+        self.multiplier_input.currentIndexChanged.connect(self.update_multiplier)
+
         speed_layout.addWidget(speed_label)
         speed_layout.addWidget(self.speed_input)
+        speed_layout.addWidget(self.multiplier_input)
+
+        quality_label = QLabel("Quality:")
+        quality_label.setStyleSheet("color: black; margin-bottom: 10px; margin-left: 10px; margin-right: 5px; font-size: 20px;")
+
+        self.quality_input = QComboBox()
+        self.quality_input.addItem("auto")
+        self.quality_input.addItems(RESOLUTION_PRESETS.keys())
+        self.quality_input.setStyleSheet("background-color: white; color: black; margin-bottom: 10px; font-size: 20px;")
+        self.quality_input.currentTextChanged.connect(self.update_quality)
+
+        speed_layout.addWidget(quality_label)
+        speed_layout.addWidget(self.quality_input)
 
         goto_layout = QHBoxLayout()
         goto_layout.setSpacing(5)
@@ -187,7 +361,9 @@ class Visualisation(QWidget):
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
+        self.pixmaps.clear()
         self.update_images()
+        self.load_frame(self.current_frame)
 
     def update_images(self):
         if self.current_algorithm_img and not self.current_algorithm_img.isNull():
@@ -205,11 +381,31 @@ class Visualisation(QWidget):
     def update_speed(self):
         try:
             self.speed = int(self.speed_input.text())
-            if self.timer.isActive():
-                self.timer.setInterval(self.speed)
+            self.restart_clock()
         except ValueError:
             pass
 
+    def update_multiplier(self, index):
+        self.multiplier = PLAYBACK_SPEEDS[index]
+        self.restart_clock()
+
+    def restart_clock(self):
+        self.play_started = time.perf_counter()
+        self.play_origin = self.current_frame
+
+    def update_playback_label(self):
+        now = time.perf_counter()
+        while self.shown_times and now - self.shown_times[0] > FPS_WINDOW:
+            self.shown_times.popleft()
+        fps = len(self.shown_times) / FPS_WINDOW
+        dropped = max(self.frames_advanced - self.frames_shown, 0)
+        self.playback_label.setText(f"FPS: {fps:.1f}  Dropped: {dropped}")
+
+    def update_quality(self, text):
+        self.resolution = RESOLUTION_PRESETS.get(text)
+        self.pixmaps.clear()
+        self.load_frame(self.current_frame)
+
     def go_to_first(self):
         self.timeline_slider.setValue(0)
 
@@ -227,14 +423,19 @@ class Visualisation(QWidget):
     def go_to_specific_iteration(self):
         try:
             value = int(self.goto_input.text())
-            if 1 <= value <= self.iteration:
-                self.timeline_slider.setValue((value-1) * self.epochs)
+            if self.recording is not None and 1 <= value <= self.iteration:
+                self.timeline_slider.setValue(self.recording.iterationStart(value - 1))
         except ValueError:
             pass
 
     def start_visualisation(self):
         if not self.timer.isActive():
-            self.timer.start(self.speed)
+            self.frames_advanced = 0
+            self.frames_shown = 0
+            self.last_shown = None
+            self.shown_times.clear()
+            self.restart_clock()
+            self.timer.start()
             self.play_btn.setText("Pause")
             self.play_btn.setToolTip("Pause")
             self.play_btn.clicked.disconnect()
@@ -247,36 +448,98 @@ class Visualisation(QWidget):
             self.play_btn.setToolTip("Play")
             self.play_btn.clicked.disconnect()
             self.play_btn.clicked.connect(self.start_visualisation)
+            self.settle_timer.start()
 
     def update_visualisation(self):
-        if self.current_frame < self.max_frames:
-            self.current_frame += 1
-            self.timeline_slider.setValue(self.current_frame)
-        else:
+        elapsed = time.perf_counter() - self.play_started
+        target = min(self.play_origin + int(elapsed * 1000 * self.multiplier / self.speed), self.max_frames)
+        if target > self.current_frame:
+            self.frames_advanced += target - self.current_frame
+            self.scheduled_frame = target
+            self.timeline_slider.setValue(target)
+        self.update_playback_label()
+        if target >= self.max_frames:
             self.pause_visualisation()
 
     def slider_changed(self, value):
+        scheduled = self.timer.isActive() and value == self.scheduled_frame
+        if scheduled and value > self.current_frame:
+            self.direction = value - self.current_frame
+        elif value != self.current_frame:
+            self.direction = 1 if value > self.current_frame else -1
         self.current_frame = value
-        self.goto_input.setText(str(value//self.epochs+1))
+        if self.timer.isActive() and not scheduled:
+            self.restart_clock()
+        if self.recording is not None:
+            self.goto_input.setText(str(self.recording.locate(value)[0] + 1))
         self.load_frame(value)
 
-    def load_frame(self, frame_num):
-        self.current_algorithm_img = QPixmap(f'./frames/algorithm_{frame_num}.jpg')
-        self.current_average_img = QPixmap(f'./frames/average_fitness_{frame_num}.jpg')
+    def target_sizes(self):
+        return tuple((label.width(), label.height()) for label in (self.algorithm_label, self.average_label))
+
+    def tiers(self, sizes):
+        full = self.resolution or max(fitDpi(*size) for size in sizes)
+        return max(MIN_DPI, int(full * PREVIEW_SCALE)), full
+
+    def cached_pixmaps(self, frame_num, sizes):
+        preview, full = self.tiers(sizes)
+        return self.pixmaps.get((frame_num, sizes, full)) or self.pixmaps.get((frame_num, sizes, preview))
+
+    def frame_ready(self, key, images):
+        frame_num, sizes, dpi = key
+        if sizes != self.target_sizes() or dpi not in self.tiers(sizes):
+            return
+        self.pixmaps.put(key, tuple(QPixmap.fromImage(image) for image in images))
+        late = self.timer.isActive() and self.play_origin <= frame_num < self.current_frame \
+            and (self.last_shown is None or frame_num > self.last_shown)
+        if frame_num == self.current_frame or late:
+            self.show_pixmaps(frame_num, self.cached_pixmaps(frame_num, sizes))
+
+    def render_full(self):
+        if self.prefetcher is not None and not self.timer.isActive():
+            sizes = self.target_sizes()
+            self.prefetcher.request(self.current_frame, self.direction, sizes, self.tiers(sizes), full=True)
+
+    def refresh_frames(self):
+        if self.recording is None:
+            return
+        self.max_frames = max(self.recording.frameCount() - 1, 0)
+        self.iteration = self.recording.iterations
+        self.timeline_slider.setRange(0, self.max_frames)
+        self.goto_input.setValidator(QIntValidator(1, self.iteration))
+        if self.recording.finished and not self.finished:
+            self.finished = True
+            self.pixmaps.clear()
+            if self.prefetcher is not None:
+                self.prefetcher.images.clear()
+            self.load_frame(self.current_frame)
+
+    def stop_prefetch(self):
+        if self.prefetcher is not None:
+            self.prefetcher.stop()
+            self.prefetcher = None
 
-        if not self.current_algorithm_img.isNull():
-            self.algorithm_label.setPixmap(self.current_algorithm_img.scaled(
-                self.algorithm_label.size(),
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation
-            ))
-        
-        if not self.current_average_img.isNull():
-            self.average_label.setPixmap(self.current_average_img.scaled(
-                self.average_label.size(),
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation
-            ))
+    def load_frame(self, frame_num):
+        if self.prefetcher is None:
+            return
+        sizes = self.target_sizes()
+        pixmaps = self.cached_pixmaps(frame_num, sizes)
+        lookahead = min(max(frame_num + self.direction * (PREFETCH_AHEAD // 2), 0), self.max_frames)
+        if not self.timer.isActive() or pixmaps is None or self.cached_pixmaps(lookahead, sizes) is None:
+            self.prefetcher.request(frame_num, self.direction, sizes, self.tiers(sizes))
+        if pixmaps is not None:
+            self.show_pixmaps(frame_num, pixmaps)
+        if not self.timer.isActive():
+            self.settle_timer.start()
+
+    def show_pixmaps(self, frame_num, pixmaps):
+        if self.timer.isActive() and frame_num != self.last_shown:
+            self.frames_shown += 1
+            self.shown_times.append(time.perf_counter())
+        self.last_shown = frame_num
+        self.current_algorithm_img, self.current_average_img = pixmaps
+        self.algorithm_label.setPixmap(self.current_algorithm_img)
+        self.average_label.setPixmap(self.current_average_img)
 
     def create_visualisation_frame(self, title):
         frame = QFrame()